@@ -0,0 +1,302 @@
+"""Headless rerun-latency benchmark for every page of grow.py.
+
+Drives the app with Streamlit's AppTest, seeding session state with N uploads,
+comments, plants and history rows. For each (page, size) it reports p50/p95 rerun
+time, the traced size of the seeded session data (state MB) and the traced peak
+of seeding plus the session's first run (peak MB). Process-wide resources are
+built by a warm-up pass first, so every page is measured the same way. Results
+are compared against a stored baseline and the script exits non-zero on
+regressions.
+
+Pages with per-card fragments are also measured on a click inside one card
+("<page> click"): like the browser, that reruns only the card's fragment.
+
+    python benchmarks/bench_rerun.py                       # compare with baseline.json
+    python benchmarks/bench_rerun.py --update-baseline     # record a new baseline
+    python benchmarks/bench_rerun.py --pages Community --sizes 10,10000
+
+Streamlit logs its warnings to stderr; add 2>/dev/null for a clean table.
+"""
+import argparse
+import atexit
+import gc
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+APP_PATH = os.path.join(ROOT, "grow.py")
+DEFAULT_BASELINE = os.path.join(ROOT, "benchmarks", "baseline.json")
+PAGES = ["Home", "My Plants", "Community", "Sponsor Dashboard", "Admin Panel"]
+
+# Absolute increase each metric may show on top of --tolerance; small values (a 20 ms click,
+# 0.01 MB of state) otherwise fail on rounding and run-to-run noise alone
+MIN_REGRESSION = {"p95_ms": 25, "state_mb": 0.5, "peak_mb": 1}
+
+# Key prefix of a button inside a fragment card, per page; the click scenario presses the first one
+FRAGMENT_CLICKS = {"My Plants": "update_plant_", "Community": "like_photo_"}
+
+
+def sample_photo():
+    """Returns a small JPEG, stored once in the media store with its thumbnails."""
+    import io
+    from PIL import Image
+    buf = io.BytesIO()
+    Image.new("RGB", (1200, 900), "#66BB6A").save(buf, "JPEG")
+    return buf.getvalue()
+
+
+def prepare_media(data_dir):
+    """Stores the sample photo and its thumbnails so the grid never waits on the worker pool."""
+    from farmboard.media import DiskMediaStore
+    from farmboard.thumbnails import derivative_name, render_thumbnails
+    store = DiskMediaStore(os.path.join(data_dir, "media"))
+    data = sample_photo()
+    digest = store.put(data)
+    for width, thumb in render_thumbnails(data).items():
+        store.put_derivative(digest, derivative_name(width), thumb)
+    return digest
+
+
+def seed_session(at, size, media_digest):
+    """Fills an AppTest's session state with `size` items of each kind of per-user data."""
+    from farmboard.feed import PostFeed
+    from farmboard.garden import SPECIES, Garden, PlantHistory
+    start = datetime(2025, 1, 1)
+    at.session_state["uploads"] = PostFeed(
+        {"media": media_digest, "caption": f"Photo {i}", "location": "Benchmark City", "user": "bench",
+         "timestamp": start + timedelta(minutes=i), "likes": i % 7}
+        for i in range(size)
+    )
+    at.session_state["comments"] = PostFeed(
+        [{"user": "bench", "comment": f"Comment number {i} about basil and tomatoes", "timestamp": start + timedelta(minutes=i), "likes": i % 5}
+         for i in range(size)],
+        search_field="comment"
+    )
+    at.session_state["comments_initialized"] = True
+    plant_types = list(SPECIES)
+    garden = Garden()
+    garden.add_many(
+        [plant_types[i % len(plant_types)] for i in range(size)],
+        [datetime.now() - timedelta(days=i % 120) for i in range(size)]
+    )
+    at.session_state["user_plants"] = garden
+    history = PlantHistory()
+    history.add_many(
+        [plant_types[i % len(plant_types)] for i in range(size)],
+        [start + timedelta(days=i % 365) for i in range(size)],
+        [start + timedelta(days=i % 365 + 40) for i in range(size)],
+        [i % 4 != 0 for i in range(size)]
+    )
+    at.session_state["user_plant_history"] = history
+
+
+def share_server_state():
+    """Makes every AppTest reuse one ScriptCache and one component registry, as the server does.
+
+    AppTest creates a new cache per run, so each rerun (even a fragment rerun) would
+    include recompiling grow.py, which no real rerun pays. Each new AppTest also scans
+    every installed package for components on its first run (the server does that once
+    at startup), which lands in that page's traced peak.
+    """
+    from streamlit.components.v2.component_manager import BidiComponentManager
+    from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+    from streamlit.testing.v1 import app_test, local_script_runner
+    cache = ScriptCache()
+    app_test.ScriptCache = local_script_runner.ScriptCache = lambda: cache
+    components = BidiComponentManager()
+    components.discover_and_register_components(start_file_watching=False)
+    components.discover_and_register_components = lambda **kwargs: None # Already done
+    app_test.BidiComponentManager = lambda: components
+
+
+def warm_up(media_digest, timeout):
+    """Runs every page once, so process-wide resources (caches, pools, logs) exist before anything is measured."""
+    from streamlit.testing.v1 import AppTest
+    for page in PAGES:
+        at = AppTest.from_file(APP_PATH, default_timeout=timeout)
+        seed_session(at, 10, media_digest)
+        at.session_state["simulated_role"] = "admin"
+        at.session_state["navigation_radio"] = page
+        at.run()
+
+
+def bench_page(page, size, runs, media_digest, timeout):
+    """Returns p50/p95 rerun seconds, seeded state MB and peak traced MB for one page at one data size."""
+    from streamlit.testing.v1 import AppTest
+    at = AppTest.from_file(APP_PATH, default_timeout=timeout)
+    # Traced from before seeding, so the peak covers the session's data and not just one rerun's temporaries
+    tracemalloc.start()
+    seed_session(at, size, media_digest)
+    state = tracemalloc.get_traced_memory()[0]
+    at.session_state["simulated_role"] = "admin"
+    at.session_state["navigation_radio"] = page
+    at.run() # The session's first run (sample data, spill slots) on top of the seeded state
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    if at.exception:
+        raise RuntimeError(f"{page} ({size}) raised: {at.exception[0].value}")
+
+    # Timed without tracing, which would skew them. Earlier sessions' garbage (up to 10000
+    # items each) is collected first, so no timed rerun pays for another page's data
+    gc.collect()
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        at.run()
+        timings.append(time.perf_counter() - start)
+    return {
+        "p50_ms": round(float(np.percentile(timings, 50)) * 1000, 2),
+        "p95_ms": round(float(np.percentile(timings, 95)) * 1000, 2),
+        "state_mb": round(state / 1e6, 2),
+        "peak_mb": round(peak / 1e6, 2)
+    }
+
+
+def fragment_script_runner():
+    """Returns a LocalScriptRunner subclass that can rerun a single fragment.
+
+    AppTest always reruns the whole script, but the browser sends a click inside a
+    fragment as a rerun of just that fragment. The subclass records which fragment
+    drew each widget and, while `fragment_id` is set, requests the same
+    fragment-only rerun the browser would.
+    """
+    from dataclasses import replace
+    from streamlit.testing.v1.local_script_runner import LocalScriptRunner
+
+    class FragmentScriptRunner(LocalScriptRunner):
+        fragment_id = None
+        widget_fragments = {} # widget id -> id of the innermost fragment that drew it
+
+        def request_rerun(self, rerun_data):
+            accepted = super().request_rerun(rerun_data)
+            if FragmentScriptRunner.fragment_id is not None:
+                # A fresh runner starts with a full rerun pending, which would absorb a fragment
+                # request, so the fragment is set on the coalesced request instead
+                self._requests._rerun_data = replace(self._requests._rerun_data, fragment_id_queue=[FragmentScriptRunner.fragment_id])
+            return accepted
+
+        def forward_msgs(self):
+            msgs = super().forward_msgs()
+            for msg in msgs:
+                if msg.WhichOneof("type") != "delta" or not msg.delta.fragment_id:
+                    continue
+                if msg.delta.WhichOneof("type") == "new_element":
+                    element = msg.delta.new_element
+                    widget_id = getattr(getattr(element, element.WhichOneof("type")), "id", "")
+                    if widget_id:
+                        FragmentScriptRunner.widget_fragments[widget_id] = msg.delta.fragment_id
+            return msgs
+
+    return FragmentScriptRunner
+
+
+def bench_click(page, size, runs, media_digest, timeout):
+    """Returns p50/p95 seconds of the fragment-only rerun after clicking a button in one card."""
+    from streamlit.testing.v1 import AppTest, app_test
+    runner, app_test.LocalScriptRunner = app_test.LocalScriptRunner, fragment_script_runner()
+    try:
+        at = AppTest.from_file(APP_PATH, default_timeout=timeout)
+        seed_session(at, size, media_digest)
+        at.session_state["simulated_role"] = "admin"
+        at.session_state["navigation_radio"] = page
+        at.run()
+        gc.collect() # As in bench_page
+        timings = []
+        for _ in range(runs):
+            button = next(b for b in at.button if (b.key or "").startswith(FRAGMENT_CLICKS[page]))
+            app_test.LocalScriptRunner.fragment_id = app_test.LocalScriptRunner.widget_fragments[button.id]
+            start = time.perf_counter()
+            button.click().run()
+            timings.append(time.perf_counter() - start)
+            app_test.LocalScriptRunner.fragment_id = None
+            if at.exception:
+                raise RuntimeError(f"{page} click ({size}) raised: {at.exception[0].value}")
+            at.run() # A fragment run only returns the card; redraw the page for the next click
+    finally:
+        app_test.LocalScriptRunner = runner
+    return {
+        "p50_ms": round(float(np.percentile(timings, 50)) * 1000, 2),
+        "p95_ms": round(float(np.percentile(timings, 95)) * 1000, 2)
+    }
+
+
+def compare(results, baseline, tolerance):
+    """Returns a list of regression messages (p95, state or peak memory above baseline * (1 + tolerance) + MIN_REGRESSION)."""
+    regressions = []
+    for key, current in results.items():
+        previous = baseline.get(key)
+        if previous is None:
+            continue
+        for metric, slack in MIN_REGRESSION.items():
+            if metric in current and metric in previous and current[metric] > previous[metric] * (1 + tolerance) + slack:
+                regressions.append(f"{key}: {metric} {previous[metric]} -> {current[metric]}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", default=",".join(PAGES), help="Comma-separated pages to benchmark")
+    parser.add_argument("--sizes", default="10,1000,10000", help="Comma-separated session data sizes")
+    parser.add_argument("--runs", type=int, default=5, help="Measured reruns per page and size")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline JSON file")
+    parser.add_argument("--update-baseline", action="store_true", help="Write results to the baseline file")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative slowdown before failing")
+    parser.add_argument("--timeout", type=float, default=600, help="Seconds allowed per rerun")
+    args = parser.parse_args()
+
+    # Keep benchmark data (media, counters, event log) out of the real data directory
+    data_dir = tempfile.mkdtemp(prefix="grow-bench-")
+    # Registered first, so it runs last: the app's own exit handlers (e.g. the counters' final flush) still write here
+    atexit.register(shutil.rmtree, data_dir, ignore_errors=True)
+    os.environ["GROW_DATA_DIR"] = data_dir
+    os.environ.setdefault("GROW_TELEMETRY_PORT", "0") # Don't collide with a running app's sensor endpoint
+    media_digest = prepare_media(data_dir)
+    share_server_state()
+    warm_up(media_digest, args.timeout)
+
+    results = {}
+    print(f"{'page':<20}{'size':>8}{'p50 ms':>12}{'p95 ms':>12}{'state MB':>10}{'peak MB':>10}")
+    for page in args.pages.split(","):
+        for size in (int(s) for s in args.sizes.split(",")):
+            result = bench_page(page, size, args.runs, media_digest, args.timeout)
+            results[f"{page}|{size}"] = result
+            print(f"{page:<20}{size:>8}{result['p50_ms']:>12}{result['p95_ms']:>12}{result['state_mb']:>10}{result['peak_mb']:>10}", flush=True)
+            if page in FRAGMENT_CLICKS:
+                result = bench_click(page, size, args.runs, media_digest, args.timeout)
+                results[f"{page} click|{size}"] = result
+                print(f"{page + ' click':<20}{size:>8}{result['p50_ms']:>12}{result['p95_ms']:>12}{'-':>10}{'-':>10}", flush=True)
+
+    if args.update_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                baseline = json.load(f)
+        baseline.update(results)
+        with open(args.baseline, "w") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print("No baseline found; run with --update-baseline to record one.")
+        return 0
+    with open(args.baseline) as f:
+        regressions = compare(results, json.load(f), args.tolerance)
+    for message in regressions:
+        print(f"REGRESSION {message}")
+    print("No regressions." if not regressions else f"{len(regressions)} regression(s).")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1 @@
+"""Supporting services for the Growvertising Streamlit app (grow.py)."""
@@ -0,0 +1,78 @@
+"""Billboard campaign images: decoded once, pre-resized per breakpoint and served from memory."""
+import io
+import threading
+from collections import OrderedDict
+
+from PIL import Image, ImageDraw, ImageFont, ImageOps
+
+# Widths (px) of the precomputed variants; callers get the smallest one covering their width
+BREAKPOINTS = (480, 960, 1600)
+
+
+def _placeholder(name, width):
+    """Returns a plain green 16:9 card naming the campaign, used when its image is missing."""
+    img = Image.new("RGB", (width, width * 9 // 16), "#C8E6C9")
+    draw = ImageDraw.Draw(img)
+    try:
+        font = ImageFont.load_default(size=max(width // 20, 12))
+    except TypeError:
+        font = ImageFont.load_default()
+    draw.text((width // 2, width * 9 // 32), name, fill="#2E7D32", font=font, anchor="mm")
+    return img
+
+
+class BillboardAssets:
+    """Checks and decodes every campaign image once, at construction.
+
+    For each campaign a master copy (at most the largest breakpoint wide) stays decoded
+    in memory, and JPEG-encoded variants per breakpoint live in a bounded LRU. Variants
+    evicted from the LRU are re-encoded from the master, so serving an image never
+    touches the disk. Missing or unreadable files fall back to a generated placeholder
+    and are listed in `missing`.
+    """
+
+    def __init__(self, paths, breakpoints=BREAKPOINTS, max_variants=32, quality=85):
+        self.breakpoints = tuple(sorted(breakpoints))
+        self.max_variants = max_variants
+        self.quality = quality
+        self.missing = []
+        self._masters = {}
+        self._variants = OrderedDict() # (name, width) -> JPEG bytes
+        self._lock = threading.Lock()
+        for name, path in paths.items():
+            self._masters[name] = self._load_master(name, path)
+            for width in self.breakpoints:
+                self.variant(name, width)
+
+    def _load_master(self, name, path):
+        largest = self.breakpoints[-1]
+        try:
+            with Image.open(path) as img:
+                img = ImageOps.exif_transpose(img).convert("RGB")
+                if img.width > largest:
+                    img = img.resize((largest, round(img.height * largest / img.width)), Image.LANCZOS)
+                return img
+        except (OSError, ValueError):
+            self.missing.append(name)
+            return _placeholder(name, largest)
+
+    def _breakpoint(self, width):
+        return next((bp for bp in self.breakpoints if bp >= width), self.breakpoints[-1])
+
+    def variant(self, name, width):
+        """Returns JPEG bytes of the campaign image for a display `width` (in px)."""
+        key = (name, self._breakpoint(width))
+        with self._lock:
+            if key in self._variants:
+                self._variants.move_to_end(key)
+                return self._variants[key]
+        master = self._masters[name]
+        img = master if master.width <= key[1] else master.resize((key[1], round(master.height * key[1] / master.width)), Image.LANCZOS)
+        buf = io.BytesIO()
+        img.save(buf, "JPEG", quality=self.quality, optimize=True)
+        data = buf.getvalue()
+        with self._lock:
+            self._variants[key] = data
+            while len(self._variants) > self.max_variants:
+                self._variants.popitem(last=False)
+        return data
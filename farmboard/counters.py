@@ -0,0 +1,82 @@
+"""Process-wide impact counters (plants grown, CO2 offset, seed kits) shared by all sessions."""
+import atexit
+import os
+import sqlite3
+import threading
+
+
+class CounterService:
+    """Named integer counters held in memory, with write-behind batching to SQLite.
+
+    Reads and increments only touch the in-memory values. Increments are also buffered
+    as pending deltas, and a background thread writes all of them in one transaction
+    every `flush_interval` seconds, so a burst of clicks becomes a single write.
+    Pending deltas are also written when the interpreter exits. Without a `db_path`
+    the counters are kept in memory only.
+    """
+
+    def __init__(self, defaults, db_path=None, flush_interval=5.0):
+        self.db_path = db_path
+        self.flush_interval = flush_interval
+        self._values = dict(defaults)
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        if db_path:
+            os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+            self._load(defaults)
+            threading.Thread(target=self._flush_loop, name="counter-flush", daemon=True).start()
+            atexit.register(self.close) # The flush thread is a daemon: write the last deltas on shutdown
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=10)
+
+    def _load(self, defaults):
+        """Creates the table, seeds missing counters with their defaults and reads current values."""
+        with self._connect() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+            conn.executemany("INSERT OR IGNORE INTO counters (name, value) VALUES (?, ?)", defaults.items())
+            self._values.update(conn.execute("SELECT name, value FROM counters"))
+        conn.close()
+
+    def get(self, name):
+        return self._values.get(name, 0)
+
+    def snapshot(self):
+        """Returns a consistent copy of all counters."""
+        with self._lock:
+            return dict(self._values)
+
+    def increment(self, name, amount=1):
+        with self._lock:
+            self._values[name] = self._values.get(name, 0) + amount
+            self._pending[name] = self._pending.get(name, 0) + amount
+
+    def flush(self):
+        """Writes all pending deltas in a single transaction."""
+        with self._lock:
+            batch, self._pending = self._pending, {}
+        if not batch or not self.db_path:
+            return
+        try:
+            with self._connect() as conn:
+                conn.executemany(
+                    "INSERT INTO counters (name, value) VALUES (?, ?) "
+                    "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+                    batch.items()
+                )
+            conn.close()
+        except sqlite3.Error:
+            # Keep the deltas so the next flush retries them
+            with self._lock:
+                for name, amount in batch.items():
+                    self._pending[name] = self._pending.get(name, 0) + amount
+
+    def _flush_loop(self):
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+
+    def close(self):
+        """Stops the background thread and writes anything still pending."""
+        self._stop.set()
+        self.flush()
@@ -0,0 +1,138 @@
+"""Near-duplicate photo detection: perceptual hashes (dHash) with a multi-index Hamming lookup."""
+import io
+import itertools
+import os
+import threading
+
+import numpy as np
+from PIL import Image, ImageOps
+
+# Hashes at most this many bits apart (of 64) are treated as the same photo
+DUPLICATE_MAX_DISTANCE = 6
+
+
+def dhash(source, hash_size=8):
+    """Returns the difference hash of an image as an int of hash_size**2 bits.
+
+    The image is reduced to (hash_size + 1) x hash_size grey pixels and each bit says
+    whether a pixel is brighter than its left neighbour. Re-encoding, resizing and small
+    edits flip only a few bits, so near-duplicates have a small Hamming distance.
+    `source` is a file path or raw bytes.
+    """
+    with Image.open(io.BytesIO(source) if isinstance(source, bytes) else source) as img:
+        img.draft("L", (4 * hash_size, 4 * hash_size)) # JPEG: decode at a reduced scale
+        img = ImageOps.exif_transpose(img) # Same orientation as the thumbnails
+        small = img.convert("L").resize((hash_size + 1, hash_size), Image.LANCZOS)
+    pixels = np.asarray(small, dtype=np.int16)
+    bits = (pixels[:, 1:] > pixels[:, :-1]).ravel()
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+def hamming(a, b):
+    return (a ^ b).bit_count()
+
+
+class HammingIndex:
+    """Multi-index hashing: finds hashes within a Hamming radius without comparing against all.
+
+    Each hash is split into `chunks` equal parts and every part is indexed in its own
+    table. If two hashes differ in at most r bits, then by the pigeonhole principle at
+    least one part differs in at most r // chunks bits. A search therefore probes each
+    table with the query's part and its few variants within that radius. Only the
+    candidates found that way are compared in full.
+    """
+
+    def __init__(self, bits=64, chunks=4):
+        self.bits = bits
+        self.chunks = chunks
+        self._chunk_bits = bits // chunks
+        self._tables = [{} for _ in range(chunks)] # Per part: value -> entry numbers
+        self._values = []
+        self._keys = []
+        self._probe_masks = {} # Radius within a part -> XOR masks to probe
+
+    def _parts(self, value):
+        mask = (1 << self._chunk_bits) - 1
+        return [(value >> (i * self._chunk_bits)) & mask for i in range(self.chunks)]
+
+    def _masks(self, radius):
+        masks = self._probe_masks.get(radius)
+        if masks is None:
+            masks = [
+                sum(1 << bit for bit in flipped)
+                for r in range(radius + 1)
+                for flipped in itertools.combinations(range(self._chunk_bits), r)
+            ]
+            self._probe_masks[radius] = masks
+        return masks
+
+    def add(self, value, key):
+        """Adds `key` under hash `value` (several keys may share a hash)."""
+        entry = len(self._values)
+        self._values.append(value)
+        self._keys.append(key)
+        for table, part in zip(self._tables, self._parts(value)):
+            table.setdefault(part, []).append(entry)
+
+    def search(self, value, max_distance):
+        """Returns [(distance, key)] for all hashes within `max_distance` of `value`, nearest first."""
+        masks = self._masks(max_distance // self.chunks)
+        candidates = set()
+        for table, part in zip(self._tables, self._parts(value)):
+            for mask in masks:
+                candidates.update(table.get(part ^ mask, ()))
+        found = []
+        for entry in candidates:
+            distance = hamming(value, self._values[entry])
+            if distance <= max_distance:
+                found.append((distance, self._keys[entry]))
+        found.sort(key=lambda match: match[0])
+        return found
+
+    def __len__(self):
+        return len(self._values)
+
+
+class PhotoIndex:
+    """Process-wide perceptual hash index of stored photos, keyed by media digest.
+
+    Entries are appended to a small text file (hash, digest per line) and reloaded on
+    start, so photos uploaded before a restart are still found.
+    """
+
+    def __init__(self, path, max_distance=DUPLICATE_MAX_DISTANCE):
+        self.path = path
+        self.max_distance = max_distance
+        self._index = HammingIndex()
+        self._digests = set()
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        if os.path.exists(path):
+            with open(path) as f:
+                for line in f:
+                    parts = line.split()
+                    if len(parts) == 2: # Skip a torn last line
+                        self._insert(int(parts[0], 16), parts[1])
+
+    def _insert(self, value, digest):
+        if digest not in self._digests:
+            self._digests.add(digest)
+            self._index.add(value, digest)
+
+    def add(self, value, digest):
+        """Indexes a stored photo's hash."""
+        with self._lock:
+            if digest in self._digests:
+                return
+            self._insert(value, digest)
+            with open(self.path, "a") as f:
+                f.write(f"{value:016x} {digest}\n")
+
+    def find(self, value):
+        """Returns (distance, digest) of the closest indexed photo within max_distance, or None."""
+        with self._lock:
+            matches = self._index.search(value, self.max_distance)
+        return matches[0] if matches else None
+
+    def __len__(self):
+        return len(self._index)
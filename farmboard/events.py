@@ -0,0 +1,252 @@
+"""Append-only columnar log of campaign engagement events, with vectorized daily rollups."""
+import json
+import os
+import threading
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+EVENT_KINDS = ("seed_kit", "support", "like", "upload")
+# Event kinds that put plants in the ground, i.e. count towards a campaign's growth
+GROWTH_KINDS = ("seed_kit", "upload")
+
+SECONDS_PER_DAY = 86400
+
+# One row of the tail journal; segments store the same fields column by column
+RECORD_DTYPE = np.dtype([("ts", "<i8"), ("campaign", "<i4"), ("kind", "i1")])
+
+
+def to_epoch_seconds(moment):
+    """Converts a naive (local wall-clock) datetime or date to seconds since 1970-01-01."""
+    return int(np.datetime64(moment, "s").astype(np.int64))
+
+
+class EventLog:
+    """Engagement events stored as three columns: timestamp, campaign code and kind code.
+
+    Timestamps are naive local wall-clock seconds, matching the naive dates the app
+    uses elsewhere. Campaign names are dictionary-encoded. New events go to an
+    in-memory tail (journaled to tail.bin so nothing is lost on restart). Every
+    `segment_size` events the tail is sealed into an immutable segment with one .npy
+    file per column, which is memory-mapped for reads. Without a `root` everything
+    stays in memory. Example events (see add_examples) are never persisted.
+    """
+
+    def __init__(self, root=None, segment_size=1_000_000):
+        self.root = root
+        self.segment_size = segment_size
+        self.version = 0 # Bumped on every append, usable as a cache key
+        self._lock = threading.RLock()
+        self._campaigns = [] # code -> name
+        self._campaign_codes = {} # name -> code
+        self._segments = [] # [{"name", "rows", "ts_min", "ts_max", "columns": {field: array}}]
+        self._tail = np.empty(segment_size, dtype=RECORD_DTYPE)
+        self._tail_len = 0
+        self._examples = None # In-memory example events, {field: array}
+        if root:
+            os.makedirs(root, exist_ok=True)
+            self._load()
+
+    # --- Persistence ---
+    def _index_path(self):
+        return os.path.join(self.root, "index.json")
+
+    def _tail_path(self):
+        return os.path.join(self.root, "tail.bin")
+
+    def _load(self):
+        if os.path.exists(self._index_path()):
+            with open(self._index_path()) as f:
+                index = json.load(f)
+            self._campaigns = index["campaigns"]
+            self._campaign_codes = {name: code for code, name in enumerate(self._campaigns)}
+            for meta in index["segments"]:
+                seg_dir = os.path.join(self.root, meta["name"])
+                columns = {field: np.load(os.path.join(seg_dir, f"{field}.npy"), mmap_mode="r") for field in RECORD_DTYPE.names}
+                self._segments.append(dict(meta, columns=columns))
+        if os.path.exists(self._tail_path()):
+            # Drop a trailing partial record left by an interrupted write
+            with open(self._tail_path(), "rb") as f:
+                raw = f.read()
+            records = np.frombuffer(raw[:len(raw) - len(raw) % RECORD_DTYPE.itemsize], dtype=RECORD_DTYPE)
+            self._tail_len = 0
+            self._append_records(records, journal=False)
+
+    def _write_index(self):
+        index = {
+            "campaigns": self._campaigns,
+            "segments": [{k: v for k, v in seg.items() if k != "columns"} for seg in self._segments]
+        }
+        tmp_path = self._index_path() + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(index, f)
+        os.replace(tmp_path, self._index_path())
+
+    def _seal(self):
+        """Turns the full tail into an immutable segment and starts a new, empty tail."""
+        records = self._tail[:self._tail_len]
+        meta = {
+            "name": f"segment-{len(self._segments):06d}",
+            "rows": int(len(records)),
+            "ts_min": int(records["ts"].min()),
+            "ts_max": int(records["ts"].max())
+        }
+        if self.root:
+            seg_dir = os.path.join(self.root, meta["name"])
+            os.makedirs(seg_dir, exist_ok=True)
+            for field in RECORD_DTYPE.names:
+                np.save(os.path.join(seg_dir, f"{field}.npy"), np.ascontiguousarray(records[field]))
+            columns = {field: np.load(os.path.join(seg_dir, f"{field}.npy"), mmap_mode="r") for field in RECORD_DTYPE.names}
+        else:
+            columns = {field: records[field].copy() for field in RECORD_DTYPE.names}
+        self._segments.append(dict(meta, columns=columns))
+        self._tail_len = 0
+        if self.root:
+            self._write_index()
+            open(self._tail_path(), "wb").close() # Sealed rows now live in the segment
+
+    # --- Writes ---
+    def campaign_code(self, name):
+        """Returns the dictionary code for a campaign name, registering it if new."""
+        with self._lock:
+            code = self._campaign_codes.get(name)
+            if code is None:
+                code = len(self._campaigns)
+                self._campaigns.append(name)
+                self._campaign_codes[name] = code
+                if self.root:
+                    self._write_index()
+            return code
+
+    def append(self, kind, campaign, moment=None):
+        """Records one event (`moment` defaults to now)."""
+        self.append_many([kind], [campaign], [to_epoch_seconds(moment or datetime.now())])
+
+    def append_many(self, kinds, campaigns, timestamps):
+        """Records a batch of events; `timestamps` are epoch seconds (see to_epoch_seconds)."""
+        with self._lock:
+            self._append_records(self._encode(kinds, campaigns, timestamps), journal=True)
+
+    def add_examples(self, kinds, campaigns, timestamps):
+        """Adds example events that are held in memory only.
+
+        The rollups (daily_counts, totals) count them, so a fresh install has charts to
+        show, but they are never journaled, backed up or exported by iter_frames().
+        """
+        with self._lock:
+            records = self._encode(kinds, campaigns, timestamps)
+            self._examples = {field: records[field].copy() for field in RECORD_DTYPE.names}
+            self.version += 1
+
+    @property
+    def example_count(self):
+        return 0 if self._examples is None else len(self._examples["ts"])
+
+    def _encode(self, kinds, campaigns, timestamps):
+        kind_codes = {kind: code for code, kind in enumerate(EVENT_KINDS)}
+        records = np.empty(len(timestamps), dtype=RECORD_DTYPE)
+        records["ts"] = timestamps
+        # Encode the (few) distinct names once, then map the batch in one vectorized step
+        names, inverse = np.unique(np.asarray(campaigns, dtype=object), return_inverse=True)
+        records["campaign"] = np.array([self.campaign_code(name) for name in names], dtype=np.int32)[inverse]
+        kinds_u, kinds_inverse = np.unique(np.asarray(kinds, dtype=object), return_inverse=True)
+        records["kind"] = np.array([kind_codes[kind] for kind in kinds_u], dtype=np.int8)[kinds_inverse]
+        return records
+
+    def _append_records(self, records, journal):
+        while len(records):
+            room = self.segment_size - self._tail_len
+            chunk, records = records[:room], records[room:]
+            self._tail[self._tail_len:self._tail_len + len(chunk)] = chunk
+            self._tail_len += len(chunk)
+            if journal and self.root:
+                with open(self._tail_path(), "ab") as f:
+                    f.write(chunk.tobytes())
+            if self._tail_len == self.segment_size:
+                self._seal()
+        self.version += 1
+
+    def __len__(self):
+        """Number of recorded (not example) events."""
+        return sum(seg["rows"] for seg in self._segments) + self._tail_len
+
+    # --- Reads ---
+    def _snapshot(self):
+        """Returns the current segments, a copy of the tail and the campaign names, consistently."""
+        with self._lock:
+            return list(self._segments), self._tail[:self._tail_len].copy(), list(self._campaigns)
+
+    def _chunks(self, ts_min, ts_max):
+        """Yields (ts, campaign, kind) column arrays that may hold events in [ts_min, ts_max)."""
+        segments, tail, _ = self._snapshot()
+        examples = self._examples
+        for seg in segments:
+            if seg["ts_max"] >= ts_min and seg["ts_min"] < ts_max: # Skip segments outside the window
+                yield seg["columns"]["ts"], seg["columns"]["campaign"], seg["columns"]["kind"]
+        if len(tail):
+            yield tail["ts"], tail["campaign"], tail["kind"]
+        if examples is not None:
+            yield examples["ts"], examples["campaign"], examples["kind"]
+
+    def daily_counts(self, campaign_names, end_day, days=30, kinds=None):
+        """Returns a (days x campaigns) int64 matrix of event counts per day, oldest day first.
+
+        Only events of the given `kinds` (default: all) whose campaign is in
+        `campaign_names` are counted. The rollup is one masked bincount per chunk.
+        """
+        start = to_epoch_seconds(end_day - timedelta(days=days - 1))
+        stop = start + days * SECONDS_PER_DAY
+        n_campaigns = len(campaign_names)
+        # Map campaign codes to output columns (-1 = not requested)
+        column_of = np.full(len(self._campaigns) + 1, -1, dtype=np.int64)
+        for column, name in enumerate(campaign_names):
+            code = self._campaign_codes.get(name)
+            if code is not None:
+                column_of[code] = column
+        kind_filter = None
+        if kinds is not None:
+            kind_filter = np.zeros(len(EVENT_KINDS), dtype=bool)
+            kind_filter[[EVENT_KINDS.index(kind) for kind in kinds]] = True
+
+        totals = np.zeros(days * n_campaigns, dtype=np.int64)
+        for ts, campaign, kind in self._chunks(start, stop):
+            mask = (ts >= start) & (ts < stop)
+            if kind_filter is not None:
+                mask &= kind_filter[kind]
+            columns = column_of[np.minimum(campaign[mask], len(column_of) - 1)]
+            valid = columns >= 0
+            day = (ts[mask][valid] - start) // SECONDS_PER_DAY
+            totals += np.bincount(day * n_campaigns + columns[valid], minlength=days * n_campaigns)
+        return totals.reshape(days, n_campaigns)
+
+    def totals(self, kinds=None):
+        """Returns {campaign name: event count} over the whole log for the given `kinds` (default: all)."""
+        counts = np.zeros(len(self._campaigns) + 1, dtype=np.int64)
+        kind_filter = None
+        if kinds is not None:
+            kind_filter = np.zeros(len(EVENT_KINDS), dtype=bool)
+            kind_filter[[EVENT_KINDS.index(kind) for kind in kinds]] = True
+        for _, campaign, kind in self._chunks(np.iinfo(np.int64).min, np.iinfo(np.int64).max):
+            selected = campaign if kind_filter is None else campaign[kind_filter[kind]]
+            counts += np.bincount(np.minimum(selected, len(counts) - 1), minlength=len(counts))
+        return {name: int(counts[code]) for code, name in enumerate(self._campaigns[:len(counts) - 1])}
+
+    def iter_frames(self, chunk_rows=100_000):
+        """Yields the recorded events (no examples), oldest first, as DataFrames of at most `chunk_rows` rows.
+
+        Columns are decoded (datetime timestamps, categorical campaign and event kind)
+        one chunk at a time, so exports never materialize the full log.
+        """
+        segments, tail, campaigns = self._snapshot()
+        columns = [(s["columns"]["ts"], s["columns"]["campaign"], s["columns"]["kind"]) for s in segments]
+        if len(tail):
+            columns.append((tail["ts"], tail["campaign"], tail["kind"]))
+        for ts, campaign, kind in columns:
+            for start in range(0, len(ts), chunk_rows):
+                stop = start + chunk_rows
+                yield pd.DataFrame({
+                    "Timestamp": np.asarray(ts[start:stop]).astype("datetime64[s]"),
+                    "Campaign": pd.Categorical.from_codes(campaign[start:stop], categories=campaigns),
+                    "Event": pd.Categorical.from_codes(kind[start:stop], categories=list(EVENT_KINDS))
+                })
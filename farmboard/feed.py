@@ -0,0 +1,70 @@
+"""Helpers for the newest-first community feeds (Photo Wall and Discussion Forum)."""
+import uuid
+
+from farmboard.search import SearchIndex
+
+
+def newest_first(items, offset=0, limit=None):
+    """Returns up to `limit` items, newest first, skipping the `offset` newest.
+
+    `items` is an append-only list (oldest first). Only the requested window is
+    sliced, so the cost depends on the window size, not on the length of the feed.
+    """
+    end = len(items) - offset
+    if end <= 0:
+        return []
+    start = 0 if limit is None else max(0, end - limit)
+    return items[start:end][::-1]
+
+
+class PostFeed:
+    """Append-only list of community posts with stable ids and an id -> position index.
+
+    Each post (a dict) gets a unique "id" when added, so widget keys and lookups such as
+    like increments are O(1) and never collide, even for posts made at the same instant.
+    With `search_field`, that field of every post is indexed as it is added (see search).
+    """
+
+    def __init__(self, posts=(), search_field=None):
+        self.posts = []
+        self._positions = {}
+        self.search_field = search_field
+        self.index = SearchIndex() if search_field else None
+        for post in posts:
+            self.add(post)
+
+    def add(self, post):
+        """Appends a post, assigning it an id if it has none, and returns the id."""
+        post_id = post.setdefault("id", uuid.uuid4().hex)
+        self._positions[post_id] = len(self.posts)
+        self.posts.append(post)
+        if self.index is not None:
+            self.index.add(post_id, post.get(self.search_field, ""))
+        return post_id
+
+    def get(self, post_id):
+        return self.posts[self._positions[post_id]]
+
+    def like(self, post_id):
+        """Increments a post's like count and returns the new count."""
+        post = self.get(post_id)
+        post["likes"] = post.get("likes", 0) + 1
+        return post["likes"]
+
+    def window(self, offset=0, limit=None):
+        """Returns a newest-first window of posts (see newest_first)."""
+        return newest_first(self.posts, offset, limit)
+
+    def search(self, query, limit=20):
+        """Returns (best-matching posts, best first, number of matching posts) for a text query."""
+        post_ids, matches = self.index.search(query, limit)
+        return [self.get(post_id) for post_id in post_ids], matches
+
+    def __contains__(self, post_id):
+        return post_id in self._positions
+
+    def __iter__(self):
+        return iter(self.posts)
+
+    def __len__(self):
+        return len(self.posts)
@@ -0,0 +1,277 @@
+"""Vectorized plant growth: a user's plants as NumPy columns with per-species growth curves."""
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+# Days from planting until a plant of each species is ready to harvest
+SPECIES_DAYS_TO_HARVEST = {
+    "Tomato": 80,
+    "Basil": 60,
+    "Lettuce": 45,
+    "Spinach": 40,
+    "Mint": 90,
+    "Pepper": 90,
+    "Chives": 75
+}
+SPECIES = tuple(SPECIES_DAYS_TO_HARVEST)
+
+# Progress (%) at which a plant counts as ready to harvest
+HARVEST_READY = 99.0
+
+# Health labels by progress: > 60 Good, > 30 Needs Attention, otherwise Struggling
+HEALTH_LABELS = np.array(["Struggling", "Needs Attention", "Good"])
+
+_DAYS_TO_HARVEST = np.array([SPECIES_DAYS_TO_HARVEST[name] for name in SPECIES], dtype=float)
+# Logistic growth: 1% at planting, 50% halfway, 99% (HARVEST_READY) at the species' harvest day
+_GROWTH_RATE = 2 * np.log(99) / _DAYS_TO_HARVEST
+_MIDPOINT = _DAYS_TO_HARVEST / 2
+
+
+def growth_curve(species, days):
+    """Returns expected progress (0-100) after `days` of growth, elementwise over species codes."""
+    return 100 / (1 + np.exp(-_GROWTH_RATE[species] * (days - _MIDPOINT[species])))
+
+
+def days_to_reach(species, progress):
+    """Inverse of growth_curve: days of growth needed to reach `progress` (<= 0 means from the start)."""
+    p = np.clip(progress, 1e-6, 100 - 1e-6)
+    days = _MIDPOINT[species] - np.log(100 / p - 1) / _GROWTH_RATE[species]
+    return np.where(progress <= 0, 0.0, days)
+
+
+class Garden:
+    """A user's current plants in parallel NumPy columns, addressed by stable plant ids.
+
+    Progress is not stored; it is derived from the time since planting and the
+    species' growth curve, plus care points added with boost() ("Update Progress").
+    status() computes progress, age, health and harvest ETA for every plant in one
+    vectorized pass.
+
+    Each plant gets an id that never changes or gets reused, so widget keys built from
+    it stay attached to the same plant. Removing a plant only marks its row dead and
+    puts the row on a free list for the next add, which makes removal O(1) and leaves
+    other rows where they are.
+    """
+
+    def __init__(self, capacity=16):
+        self._id = np.zeros(capacity, dtype=np.int64)
+        self._alive = np.zeros(capacity, dtype=bool)
+        self._species = np.zeros(capacity, dtype=np.int8)
+        self._planted = np.zeros(capacity, dtype="datetime64[s]")
+        self._care = np.zeros(capacity, dtype=np.float32) # Extra progress points from care
+        self._note = np.full(capacity, -1, dtype=np.int32) # Row in self._notes, -1 = none
+        self._notes = []
+        self._rows = {} # plant id -> row
+        self._free = [] # Rows of removed plants, reused before the columns grow
+        self._used = 0 # Rows in use or on the free list (high-water mark)
+        self._next_id = 1
+
+    def _columns(self):
+        return (self._id, self._alive, self._species, self._planted, self._care, self._note)
+
+    def _allocate(self, n):
+        """Returns `n` free rows: recycled ones first, then new ones past the high-water mark."""
+        reused = [self._free.pop() for _ in range(min(n, len(self._free)))]
+        fresh = n - len(reused)
+        if self._used + fresh > len(self._id):
+            capacity = max(self._used + fresh, 2 * len(self._id)) # Grow all columns by doubling
+            self._id, self._alive, self._species, self._planted, self._care, self._note = (
+                np.concatenate([a, np.zeros(capacity - len(a), dtype=a.dtype)]) for a in self._columns()
+            )
+        rows = np.array(reused + list(range(self._used, self._used + fresh)), dtype=np.intp)
+        self._used += fresh
+        return rows
+
+    def _row(self, plant_id):
+        return self._rows[plant_id]
+
+    def add(self, species, planted, notes="", care=0.0):
+        """Adds one plant (`species` is a name from SPECIES, `planted` a datetime) and returns its id."""
+        return self.add_many([species], [planted], [notes], [care])[0]
+
+    def add_many(self, species, planted, notes=None, care=None):
+        """Adds a batch of plants and returns their ids."""
+        n = len(species)
+        rows = self._allocate(n)
+        ids = np.arange(self._next_id, self._next_id + n, dtype=np.int64)
+        self._next_id += n
+        codes = {name: code for code, name in enumerate(SPECIES)}
+        self._id[rows] = ids
+        self._alive[rows] = True
+        self._species[rows] = [codes[name] for name in species]
+        self._planted[rows] = np.array(planted, dtype="datetime64[s]")
+        self._care[rows] = 0.0 if care is None else care
+        self._note[rows] = -1
+        for row, text in zip(rows, notes or ()):
+            if text:
+                self._note[row] = len(self._notes)
+                self._notes.append(text)
+        self._rows.update(zip(ids.tolist(), rows.tolist()))
+        return ids.tolist()
+
+    def boost(self, plant_id, points):
+        """Adds care points to a plant's progress."""
+        self._care[self._row(plant_id)] += points
+
+    def record(self, plant_id, now=None):
+        """Returns one plant as a dict: id, name, planted_date, progress and notes."""
+        row = self._row(plant_id)
+        status = self.status(now, ids=[plant_id])
+        note = self._note[row]
+        return {
+            "id": plant_id,
+            "name": SPECIES[self._species[row]],
+            "planted_date": self._planted[row].astype(datetime),
+            "progress": float(status["progress"][0]),
+            "notes": self._notes[note] if note >= 0 else ""
+        }
+
+    def remove(self, plant_id, now=None):
+        """Removes a plant in O(1) and returns its record (see record)."""
+        removed = self.record(plant_id, now)
+        row = self._rows.pop(plant_id)
+        self._alive[row] = False
+        note = self._note[row]
+        if note >= 0:
+            self._notes[note] = None # Keep other plants' note indices valid
+        self._free.append(row)
+        return removed
+
+    def newest(self, limit=None):
+        """Returns the ids of the most recently added plants, newest first."""
+        ids = self._id[:self._used][self._alive[:self._used]]
+        if limit is not None and limit < len(ids):
+            ids = ids[np.argpartition(-ids, limit - 1)[:limit]] # Top `limit` without a full sort
+        return np.sort(ids)[::-1].tolist()
+
+    def status(self, now=None, ids=None):
+        """Computes growth status for all plants (or the given ids) in one vectorized pass.
+
+        Returns a dict of arrays: id, species (names), planted (datetime64[s]), days_old,
+        progress (0-100), health (labels) and harvest_eta (datetime64[D], today if ready).
+        """
+        now = np.datetime64(now or datetime.now(), "s")
+        if ids is None:
+            rows = np.flatnonzero(self._alive[:self._used])
+        else:
+            rows = np.array([self._rows[plant_id] for plant_id in ids], dtype=np.intp)
+        species = self._species[rows].astype(np.intp)
+        planted = self._planted[rows]
+        care = self._care[rows]
+        age_days = (now - planted).astype(np.float64) / 86400
+        progress = np.minimum(growth_curve(species, age_days) + care, 100.0)
+        health = HEALTH_LABELS[(progress > 30).astype(np.intp) + (progress > 60)]
+        days_left = np.ceil(np.maximum(days_to_reach(species, HARVEST_READY - care) - age_days, 0))
+        return {
+            "id": self._id[rows],
+            "species": np.asarray(SPECIES)[species],
+            "planted": planted,
+            "days_old": np.floor(age_days).astype(np.int64),
+            "progress": progress,
+            "health": health,
+            "harvest_eta": now.astype("datetime64[D]") + days_left.astype("timedelta64[D]")
+        }
+
+    def status_frame(self, now=None):
+        """Returns status() for all plants as a DataFrame, newest first."""
+        status = self.status(now)
+        order = np.argsort(-status["id"], kind="stable")
+        return pd.DataFrame({
+            "Plant": status["species"][order],
+            "Planted": status["planted"][order].astype("datetime64[D]"),
+            "Days Old": status["days_old"][order],
+            "Progress (%)": status["progress"][order],
+            "Health": status["health"][order],
+            "Harvest ETA": status["harvest_eta"][order]
+        })
+
+    def __contains__(self, plant_id):
+        return plant_id in self._rows
+
+    def __len__(self):
+        return len(self._rows)
+
+
+class PlantHistory:
+    """Finished plants as typed columns kept sorted by planting date, appended on harvest.
+
+    Species are stored as codes into SPECIES and dates as datetime64[D] (NaT for a
+    harvest date means the plant failed). Inserts keep the order with a binary search,
+    so the table is never re-sorted. frame() is built from the columns once per change
+    and reused by every rerun until the next insert.
+    """
+
+    def __init__(self, capacity=16):
+        self._species = np.zeros(capacity, dtype=np.int8)
+        self._planted = np.zeros(capacity, dtype="datetime64[D]")
+        self._harvested = np.full(capacity, np.datetime64("NaT"), dtype="datetime64[D]")
+        self._success = np.zeros(capacity, dtype=bool)
+        self._len = 0
+        self._frame = None
+
+    def _columns(self):
+        return (self._species, self._planted, self._harvested, self._success)
+
+    def add(self, species, planted, harvested, success):
+        """Records one finished plant; `harvested` is None for plants that failed."""
+        self.add_many([species], [planted], [harvested], [success])
+
+    def add_many(self, species, planted, harvested, success):
+        """Records a batch of finished plants, merged into planting order without a re-sort."""
+        codes = {name: code for code, name in enumerate(SPECIES)}
+        planted = np.array(planted, dtype="datetime64[D]")
+        order = np.argsort(planted, kind="stable")
+        batch = (
+            np.array([codes[name] for name in species], dtype=np.int8)[order],
+            planted[order],
+            np.array(harvested, dtype="datetime64[D]")[order], # None -> NaT
+            np.array(success, dtype=bool)[order]
+        )
+        n, k = self._len, len(planted)
+        if n + k > len(self._species): # Grow all columns by doubling
+            capacity = max(n + k, 2 * len(self._species))
+            self._species, self._planted, self._harvested, self._success = (
+                np.concatenate([a, np.empty(capacity - len(a), dtype=a.dtype)]) for a in self._columns()
+            )
+        # Final rows of the new entries; only rows from the first of them onwards move,
+        # and a harvest of a recent planting (the usual case) is a plain append
+        positions = np.searchsorted(self._planted[:n], batch[1], side="right") + np.arange(k)
+        start = int(positions[0]) if k else n
+        moved = np.ones(n + k - start, dtype=bool)
+        moved[positions - start] = False
+        for column, values in zip(self._columns(), batch):
+            column[start:n + k][moved] = column[start:n].copy()
+            column[positions] = values
+        self._len = n + k
+        self._frame = None
+
+    def frame(self):
+        """Returns the history as a DataFrame, most recently planted first (cached until the next add)."""
+        if self._frame is None:
+            order = slice(self._len - 1, None, -1) if self._len else slice(0, 0)
+            self._frame = pd.DataFrame({
+                "Plant Type": pd.Categorical.from_codes(self._species[order], categories=SPECIES),
+                "Date Planted": self._planted[order],
+                "Harvest Date": self._harvested[order],
+                "Success": pd.Categorical.from_codes(self._success[order].astype(np.int8), categories=["No", "Yes"])
+            })
+        return self._frame
+
+    def success_rates(self):
+        """Returns finished plants, successes and success rate (%) per species, in one bincount pass."""
+        species = self._species[:self._len]
+        finished = np.bincount(species, minlength=len(SPECIES))
+        succeeded = np.bincount(species, weights=self._success[:self._len], minlength=len(SPECIES)).astype(np.int64)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            rate = 100 * succeeded / finished
+        rates = pd.DataFrame({"Finished": finished, "Successful": succeeded, "Success Rate (%)": rate}, index=pd.Index(SPECIES, name="Plant Type"))
+        return rates[rates["Finished"] > 0]
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        state["_frame"] = None # Rebuilt on demand; keeps pickles (e.g. spill files) small
+        return state
+
+    def __len__(self):
+        return self._len
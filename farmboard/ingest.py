@@ -0,0 +1,134 @@
+"""Photo upload ingestion: spooling, EXIF stripping and recompression in a worker process pool."""
+import io
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+
+from PIL import Image, ImageOps
+
+from farmboard.thumbnails import THUMBNAIL_WIDTHS, derivative_name, render_thumbnails
+
+# Stored photos are at most this many pixels on the long side, re-encoded as JPEG at this quality
+INGEST_MAX_SIDE = 2048
+INGEST_QUALITY = 82
+
+# Spooled uploads older than this (e.g. from abandoned duplicate prompts) are deleted on start
+SPOOL_MAX_AGE_SECONDS = 24 * 3600
+
+
+def recompress(source, max_side=INGEST_MAX_SIDE, quality=INGEST_QUALITY):
+    """Decodes an uploaded image and re-encodes it as a progressive JPEG without metadata.
+
+    The EXIF orientation is applied to the pixels first, so nothing depends on the
+    (dropped) EXIF block; GPS position, camera details and other metadata are not
+    carried over. Only the ICC colour profile is kept. `source` is a file path or raw bytes.
+    """
+    with Image.open(io.BytesIO(source) if isinstance(source, bytes) else source) as img:
+        img.draft("RGB", (max_side, max_side)) # JPEG: decode at a reduced scale when much larger
+        img = ImageOps.exif_transpose(img)
+        icc_profile = img.info.get("icc_profile")
+        if img.mode in ("RGBA", "LA", "P"):
+            img = img.convert("RGBA")
+            background = Image.new("RGB", img.size, "white") # JPEG has no alpha
+            background.paste(img, mask=img.getchannel("A"))
+            img = background
+        elif img.mode != "RGB":
+            img = img.convert("RGB")
+        img.thumbnail((max_side, max_side), Image.LANCZOS)
+        buf = io.BytesIO()
+        img.save(buf, "JPEG", quality=quality, optimize=True, progressive=True, icc_profile=icc_profile)
+    return buf.getvalue()
+
+
+def ingest_photo(path, max_side=INGEST_MAX_SIDE, quality=INGEST_QUALITY, widths=THUMBNAIL_WIDTHS):
+    """Returns (recompressed photo, {width: WebP thumbnail}) for a spooled upload.
+
+    Runs inside a worker process, so it must stay a plain module-level function.
+    """
+    data = recompress(path, max_side, quality)
+    return data, render_thumbnails(data, widths)
+
+
+class IngestPipeline:
+    """Turns spooled uploads into stored photos in a process pool.
+
+    spool() copies an upload to disk, so workers are handed a path instead of the bytes
+    pickled across processes. submit() hands the file to a worker, which recompresses
+    it and renders its thumbnails. The results are then put in the media store, and the
+    photo's perceptual hash is added to `photo_index`. Until then the upload is only
+    known by the token submit() returned; see result(), which hands out each finished
+    result once, so tokens do not accumulate.
+    """
+
+    def __init__(self, store, spool_dir, executor, photo_index=None):
+        self.store = store
+        self.spool_dir = spool_dir
+        self.photo_index = photo_index
+        self._executor = executor # See image_worker_pool() in farmboard.thumbnails
+        self._results = {} # token -> ("pending" | "done" | "failed", digest or None)
+        self._lock = threading.Lock()
+        os.makedirs(spool_dir, exist_ok=True)
+        cutoff = time.time() - SPOOL_MAX_AGE_SECONDS
+        for name in os.listdir(spool_dir):
+            path = os.path.join(spool_dir, name)
+            if os.path.getmtime(path) < cutoff:
+                self.discard(path)
+
+    def spool(self, fileobj):
+        """Copies an uploaded file object to the spool directory in chunks and returns the path."""
+        fd, path = tempfile.mkstemp(dir=self.spool_dir, suffix=".upload")
+        fileobj.seek(0)
+        with os.fdopen(fd, "wb") as f:
+            shutil.copyfileobj(fileobj, f)
+        return path
+
+    def discard(self, path):
+        """Deletes a spooled upload that will not be ingested."""
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def submit(self, path, photo_hash=None):
+        """Queues a spooled upload for ingestion and returns its token."""
+        token = uuid.uuid4().hex
+        with self._lock:
+            self._results[token] = ("pending", None)
+        future = self._executor.submit(ingest_photo, path)
+        future.add_done_callback(lambda f: self._store_results(token, path, photo_hash, f))
+        return token
+
+    def _store_results(self, token, path, photo_hash, future):
+        try:
+            data, thumbnails = future.result()
+            digest = self.store.put(data)
+            for width, thumb in thumbnails.items():
+                self.store.put_derivative(digest, derivative_name(width), thumb)
+            if self.photo_index is not None and photo_hash is not None:
+                self.photo_index.add(photo_hash, digest)
+            outcome = ("done", digest)
+        except Exception:
+            outcome = ("failed", None) # Not an image Pillow can decode
+        finally:
+            self.discard(path)
+        with self._lock:
+            self._results[token] = outcome
+
+    def is_pending(self, token):
+        """Returns whether the token's upload is still being processed (does not collect it)."""
+        with self._lock:
+            return self._results.get(token, ("failed", None))[0] == "pending"
+
+    def result(self, token):
+        """Returns ("pending", None), ("done", media digest) or ("failed", None) for a token.
+
+        A finished result is handed out once and then forgotten, so the caller keeps it.
+        """
+        with self._lock:
+            outcome = self._results.get(token, ("failed", None)) # Unknown: collected, or from before a restart
+            if outcome[0] != "pending":
+                self._results.pop(token, None)
+            return outcome
@@ -0,0 +1,101 @@
+"""Background job scheduler for long-running admin tasks, with progress, cancellation and polling."""
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+
+class JobCancelled(Exception):
+    """Raised inside a job (from Job.report) once cancellation has been requested."""
+
+
+class Job:
+    """State of one submitted job. Written by the worker thread, polled by the UI."""
+
+    def __init__(self, name):
+        self.id = uuid.uuid4().hex
+        self.name = name
+        self.status = "queued" # queued -> running -> succeeded / failed / cancelled
+        self.progress = 0.0
+        self.message = ""
+        self.result = None
+        self.error = None
+        self.submitted_at = datetime.now()
+        self.finished_at = None
+        self._cancel = threading.Event()
+        self._future = None
+
+    @property
+    def done(self):
+        return self.status in ("succeeded", "failed", "cancelled")
+
+    @property
+    def cancel_requested(self):
+        return self._cancel.is_set()
+
+    def report(self, progress, message=None):
+        """Publishes progress (0..1) and raises JobCancelled if the job should stop."""
+        self.progress = min(max(progress, 0.0), 1.0)
+        if message is not None:
+            self.message = message
+        if self._cancel.is_set():
+            raise JobCancelled()
+
+
+class JobScheduler:
+    """Runs jobs on a thread pool. A job is a callable taking its Job as first argument."""
+
+    def __init__(self, max_workers=2, history=50):
+        self.history = history
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="maintenance")
+        self._jobs = {} # id -> Job, in submission order
+        self._lock = threading.Lock()
+
+    def submit(self, name, fn, *args, **kwargs):
+        """Queues a job and returns its Job immediately."""
+        job = Job(name)
+        with self._lock:
+            self._jobs[job.id] = job
+            # Forget the oldest finished jobs beyond the history limit
+            finished = [j.id for j in self._jobs.values() if j.done]
+            for job_id in finished[:max(0, len(self._jobs) - self.history)]:
+                del self._jobs[job_id]
+        job._future = self._executor.submit(self._run, job, fn, args, kwargs)
+        return job
+
+    def _run(self, job, fn, args, kwargs):
+        if job.cancel_requested:
+            job.status = "cancelled"
+        else:
+            job.status = "running"
+            try:
+                job.result = fn(job, *args, **kwargs)
+                job.progress = 1.0
+                job.status = "succeeded"
+            except JobCancelled:
+                job.status = "cancelled"
+            except Exception as e:
+                job.error = f"{type(e).__name__}: {e}"
+                job.status = "failed"
+        job.finished_at = datetime.now()
+
+    def cancel(self, job_id):
+        """Requests cancellation. Queued jobs never start; running jobs stop at their next report()."""
+        job = self._jobs.get(job_id)
+        if job is None or job.done:
+            return
+        job._cancel.set()
+        if job._future is not None and job._future.cancel():
+            job.status = "cancelled"
+            job.finished_at = datetime.now()
+
+    def get(self, job_id):
+        return self._jobs.get(job_id)
+
+    def jobs(self):
+        """Returns all known jobs, newest first."""
+        with self._lock:
+            return list(reversed(self._jobs.values()))
+
+    def has_active_jobs(self):
+        return any(not job.done for job in self.jobs())
@@ -0,0 +1,61 @@
+"""Admin maintenance tasks, written as jobs for farmboard.jobs.JobScheduler."""
+import os
+import shutil
+import sqlite3
+from datetime import datetime
+
+from farmboard.events import EVENT_KINDS, GROWTH_KINDS
+
+
+def clear_caches(job, *caches):
+    """Clears each cache object (anything with a clear() method)."""
+    for i, cache in enumerate(caches):
+        job.report(i / max(len(caches), 1), f"Clearing cache {i + 1}/{len(caches)}")
+        cache.clear()
+    return {"caches_cleared": len(caches)}
+
+
+def backup_data(job, counters, event_log, backup_root):
+    """Copies the counters database and the event log files into a timestamped backup directory."""
+    dest = os.path.join(backup_root, datetime.now().strftime("%Y%m%d-%H%M%S"))
+    os.makedirs(dest, exist_ok=True)
+    copied = 0
+    if counters.db_path:
+        job.report(0.0, "Backing up counters database")
+        counters.flush() # Include buffered increments
+        source = sqlite3.connect(counters.db_path)
+        target = sqlite3.connect(os.path.join(dest, os.path.basename(counters.db_path)))
+        with target:
+            source.backup(target)
+        source.close()
+        target.close()
+        copied += 1
+    if event_log.root:
+        files = [os.path.join(dirpath, name) for dirpath, _, names in os.walk(event_log.root) for name in names]
+        for i, path in enumerate(files):
+            job.report(0.1 + 0.9 * i / len(files), f"Copying event log ({i + 1}/{len(files)})")
+            target_path = os.path.join(dest, "events", os.path.relpath(path, event_log.root))
+            os.makedirs(os.path.dirname(target_path), exist_ok=True)
+            shutil.copy2(path, target_path) # Segments are immutable; index and tail are small
+            copied += 1
+    return {"backup_dir": dest, "files_copied": copied}
+
+
+def recalculate_statistics(job, event_log, roi_engine):
+    """Recomputes event totals from the log and resyncs the ROI engine's running aggregates.
+
+    Like the dashboard, the totals include the log's example events; the result says how many.
+    """
+    job.report(0.0, "Counting events per campaign")
+    engagement = event_log.totals()
+    job.report(0.4, "Counting growth events per campaign")
+    growth = event_log.totals(kinds=GROWTH_KINDS)
+    job.report(0.7, "Updating ROI aggregates")
+    roi_engine.reset_totals(engagement, growth)
+    per_kind = {kind: sum(event_log.totals(kinds=[kind]).values()) for kind in EVENT_KINDS}
+    return {
+        "events": sum(per_kind.values()), # Same source as events_per_kind: recorded plus examples
+        "example_events_included": event_log.example_count,
+        "events_per_kind": per_kind,
+        "campaigns": len(engagement)
+    }
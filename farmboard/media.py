@@ -0,0 +1,128 @@
+"""Content-addressed storage for community media (photo uploads and derivatives)."""
+import hashlib
+import os
+import tempfile
+import threading
+from abc import ABC, abstractmethod
+
+
+def content_digest(data):
+    """Returns the SHA-256 hex digest used as the key for a blob."""
+    return hashlib.sha256(data).hexdigest()
+
+
+class MediaStore(ABC):
+    """Interface for media backends. Blobs are immutable and keyed by content digest."""
+
+    @abstractmethod
+    def put(self, data):
+        """Stores the blob (once) and returns its digest."""
+
+    @abstractmethod
+    def read(self, digest):
+        """Returns the blob's bytes."""
+
+    @abstractmethod
+    def exists(self, digest):
+        """Returns whether the blob is stored."""
+
+    @abstractmethod
+    def delete(self, digest):
+        """Removes the blob and its derived renditions."""
+
+    @abstractmethod
+    def disk_usage(self):
+        """Returns the total number of bytes held by the store."""
+
+    @abstractmethod
+    def put_derivative(self, digest, name, data):
+        """Stores a derived rendition (e.g. a thumbnail) of the blob under the given name."""
+
+    @abstractmethod
+    def read_derivative(self, digest, name):
+        """Returns the derived rendition's bytes, or None if it has not been made yet."""
+
+
+class DiskMediaStore(MediaStore):
+    """Stores each blob once under root/<digest[:2]>/<digest[2:]>.
+
+    Identical uploads from any session share one file. read() returns the whole blob as
+    bytes; callers that can stream it (e.g. worker processes) use path() instead. The
+    bytes on disk are counted once at start and then kept up to date by every write and
+    delete, so disk_usage() is O(1).
+    """
+
+    def __init__(self, root):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+        self._lock = threading.Lock()
+        self._bytes = 0
+        for dirpath, _, filenames in os.walk(root):
+            for name in filenames:
+                self._bytes += os.path.getsize(os.path.join(dirpath, name))
+
+    def path(self, digest):
+        return os.path.join(self.root, digest[:2], digest[2:])
+
+    def derivative_path(self, digest, name):
+        return os.path.join(self.root, "derivatives", digest[:2], f"{digest[2:]}.{name}")
+
+    def put(self, data):
+        digest = content_digest(data)
+        path = self.path(digest)
+        if os.path.exists(path):
+            return digest # Already stored, nothing to write
+        self._write_atomic(path, data)
+        return digest
+
+    def _write_atomic(self, path, data):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write to a temp file in the same directory, then rename atomically so readers
+        # never see a partially written blob
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            with self._lock: # The size check and rename together, so concurrent writes of one path count once
+                replaced = os.path.getsize(path) if os.path.exists(path) else 0
+                os.replace(tmp_path, path)
+                self._bytes += len(data) - replaced
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def read(self, digest):
+        with open(self.path(digest), "rb") as f:
+            return f.read()
+
+    def put_derivative(self, digest, name, data):
+        self._write_atomic(self.derivative_path(digest, name), data)
+
+    def read_derivative(self, digest, name):
+        try:
+            with open(self.derivative_path(digest, name), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def exists(self, digest):
+        return os.path.exists(self.path(digest))
+
+    def delete(self, digest):
+        paths = [self.path(digest)]
+        derivatives_dir = os.path.dirname(self.derivative_path(digest, ""))
+        if os.path.isdir(derivatives_dir):
+            prefix = f"{digest[2:]}."
+            paths += [os.path.join(derivatives_dir, name) for name in os.listdir(derivatives_dir) if name.startswith(prefix)]
+        for path in paths:
+            with self._lock:
+                try:
+                    size = os.path.getsize(path)
+                    os.remove(path)
+                except FileNotFoundError:
+                    continue
+                self._bytes -= size
+
+    def disk_usage(self):
+        return self._bytes
@@ -0,0 +1,150 @@
+"""In-process render timing histograms with Prometheus text export."""
+import bisect
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Upper bounds (seconds) of the histogram buckets; a final +Inf bucket is implicit
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class Histogram:
+    """Fixed-bucket histogram of durations: O(log buckets) per observation, constant memory."""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1) # Last slot is the +Inf bucket
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        with self._lock:
+            self.counts[bisect.bisect_left(self.buckets, value)] += 1
+            self.count += 1
+            self.sum += value
+            self.max = max(self.max, value)
+
+    def quantile(self, q):
+        """Estimates the q-quantile by linear interpolation inside the bucket that holds it."""
+        with self._lock:
+            counts, count, largest = list(self.counts), self.count, self.max
+        if count == 0:
+            return 0.0
+        rank = q * count
+        seen = 0
+        for i, bucket_count in enumerate(counts):
+            if bucket_count and seen + bucket_count >= rank:
+                lower = self.buckets[i - 1] if i > 0 else 0.0
+                upper = self.buckets[i] if i < len(self.buckets) else largest
+                return min(lower + (upper - lower) * (rank - seen) / bucket_count, largest)
+            seen += bucket_count
+        return largest
+
+
+class MetricsRegistry:
+    """Named duration histograms, e.g. one per page and per expensive page section."""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self._histograms = {}
+        self._lock = threading.Lock()
+        self._server = None
+
+    def histogram(self, name):
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = self._histograms[name] = Histogram(self.buckets)
+            return histogram
+
+    def observe(self, name, seconds):
+        self.histogram(name).observe(seconds)
+
+    @contextmanager
+    def timer(self, name):
+        """Times the enclosed block into histogram `name`.
+
+        Blocks cut short by an exception (including Streamlit's rerun) are recorded
+        too, since that time was still spent on the rerun.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start)
+
+    def summary(self):
+        """Returns one dict per histogram, sorted by name, with counts and times in milliseconds."""
+        with self._lock:
+            items = sorted(self._histograms.items())
+        return [
+            {
+                "name": name,
+                "count": histogram.count,
+                "total_s": histogram.sum,
+                "mean_ms": 1000 * histogram.sum / histogram.count if histogram.count else 0.0,
+                "p50_ms": 1000 * histogram.quantile(0.5),
+                "p95_ms": 1000 * histogram.quantile(0.95),
+                "max_ms": 1000 * histogram.max
+            }
+            for name, histogram in items
+        ]
+
+    def render_prometheus(self, metric="grow_render_seconds"):
+        """Returns all histograms in the Prometheus text exposition format, labelled by section."""
+        with self._lock:
+            items = sorted(self._histograms.items())
+        lines = [
+            f"# HELP {metric} Time spent rendering a page or page section.",
+            f"# TYPE {metric} histogram"
+        ]
+        for name, histogram in items:
+            with histogram._lock:
+                counts, count, total = list(histogram.counts), histogram.count, histogram.sum
+            cumulative = 0
+            for bound, bucket_count in zip(list(histogram.buckets) + ["+Inf"], counts):
+                cumulative += bucket_count
+                lines.append(f'{metric}_bucket{{section="{name}",le="{bound}"}} {cumulative}')
+            lines.append(f'{metric}_sum{{section="{name}"}} {total}')
+            lines.append(f'{metric}_count{{section="{name}"}} {count}')
+        return "\n".join(lines) + "\n"
+
+    def write_textfile(self, path):
+        """Writes the Prometheus text atomically, e.g. for node_exporter's textfile collector."""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            f.write(self.render_prometheus())
+        os.replace(tmp_path, path)
+        return path
+
+    def serve(self, port, host="127.0.0.1"):
+        """Serves the Prometheus text on http://host:port/metrics from a daemon thread."""
+        if self._server is not None:
+            return self._server
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.rstrip("/") != "/metrics":
+                    self.send_error(404)
+                    return
+                body = registry.render_prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", PROMETHEUS_CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass # Keep scrapes out of the app's log
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=self._server.serve_forever, name="metrics-http", daemon=True).start()
+        return self._server
@@ -0,0 +1,237 @@
+"""Content moderation queue for community posts, ranked by a vectorized first-pass spam score."""
+import re
+import threading
+import time
+import zlib
+from array import array
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+# Size of the hashed word n-gram feature space
+NGRAM_FEATURES = 2 ** 14
+
+# Posts by one author within this many seconds count towards their posting rate
+RATE_WINDOW_SECONDS = 3600
+
+SPAM_KEYWORDS = frozenset(
+    "buy cheap free discount offer deal click winner prize cash money crypto bitcoin casino "
+    "loan viagra followers subscribe promo guaranteed earn income".split()
+)
+
+# Starting examples for the n-gram weights; every moderator decision is added on top
+SEED_SPAM = (
+    "Buy cheap widgets now! www.spam.com",
+    "Click here for free followers http://bit.ly/xyz",
+    "Earn money fast from home, guaranteed income, DM me",
+    "Best crypto casino bonus, claim your prize today",
+    "Discount offer!!! Visit our shop for the best deal"
+)
+SEED_HAM = (
+    "Just harvested my first batch of tomatoes!",
+    "Has anyone had issues with yellowing leaves on their basil plants?",
+    "The community garden project is coming along nicely",
+    "My balcony herbs are growing so well this spring",
+    "Any tips for watering lettuce in hot weather?"
+)
+
+# Weights of the hand-made features in the spam logit (n-gram evidence is added as-is)
+_BIAS = -2.5
+_URL_WEIGHT = 1.5
+_KEYWORD_WEIGHT = 0.8
+_CAPS_WEIGHT = 2.0
+_RATE_WEIGHT = 0.4 # Per post above _RATE_ALLOWANCE in the rate window
+_RATE_ALLOWANCE = 3
+
+KINDS = ("photo", "comment")
+
+PENDING, APPROVED, REJECTED = 0, 1, 2
+STATUS_LABELS = {PENDING: "Pending", APPROVED: "Approved", REJECTED: "Rejected"}
+
+_URL_RE = re.compile(r"https?://|www\.|\b[\w-]+\.(?:com|net|org|ru|xyz|ly|io|biz|info)\b", re.IGNORECASE)
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+def _column(values, dtype):
+    """Copies an append-only array.array into NumPy (a view would block further appends)."""
+    return np.frombuffer(values, dtype=dtype).copy()
+
+
+def hashed_ngrams(text):
+    """Returns the hashed word unigrams and bigrams of `text` as feature indices."""
+    words = _WORD_RE.findall(text.lower())
+    grams = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+    return [zlib.crc32(gram.encode("utf-8")) % NGRAM_FEATURES for gram in grams]
+
+
+class ModerationQueue:
+    """Process-wide queue of community posts awaiting review, ordered by spam score.
+
+    Posts are published at once and reviewed afterwards. Rejecting one hides it
+    everywhere (see is_rejected). Per-post features (links, spam keywords, share of
+    capitals, hashed n-grams) are extracted once on submit. score() then rates every
+    item in one NumPy pass, including each author's posting rate. The n-gram weights
+    are naive Bayes log-odds from the seed examples plus every approve/reject
+    decision, so the ranking learns from moderators.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.items = [] # Per item: dict with kind, post_id, user, text, timestamp
+        self._kinds = array("b") # Indices into KINDS
+        self._status = array("b")
+        self._urls = array("f")
+        self._keywords = array("f")
+        self._caps = array("f")
+        self._times = array("d") # Epoch seconds
+        self._authors = array("i") # Codes into self._author_codes
+        self._author_codes = {}
+        # Hashed n-grams of all items, flattened: feature index and owning item
+        self._ngram_feature = array("i")
+        self._ngram_item = array("i")
+        self._posts = {} # post id -> item number
+        self._rejected_posts = set()
+        self._spam_counts = np.ones(NGRAM_FEATURES) # Laplace smoothing
+        self._ham_counts = np.ones(NGRAM_FEATURES)
+        self._scores = None # Cached score() result, cleared on any change
+        self._rates = None # Posts/h per item, computed with the scores
+        for text in SEED_SPAM:
+            np.add.at(self._spam_counts, hashed_ngrams(text), 1)
+        for text in SEED_HAM:
+            np.add.at(self._ham_counts, hashed_ngrams(text), 1)
+
+    def submit(self, kind, post_id, user, text, timestamp=None, author=None):
+        """Queues a post for review. `author` (default `user`) identifies the poster for rate limiting."""
+        timestamp = timestamp or time.time()
+        if not isinstance(timestamp, (int, float)):
+            timestamp = timestamp.timestamp()
+        words = _WORD_RE.findall(text.lower())
+        letters = [c for c in text if c.isalpha()]
+        ngrams = hashed_ngrams(text)
+        with self._lock:
+            item = len(self.items)
+            self.items.append({"kind": kind, "post_id": post_id, "user": user, "text": text, "timestamp": timestamp})
+            self._kinds.append(KINDS.index(kind))
+            self._status.append(PENDING)
+            self._urls.append(len(_URL_RE.findall(text)))
+            self._keywords.append(sum(word in SPAM_KEYWORDS for word in words))
+            self._caps.append(sum(c.isupper() for c in letters) / len(letters) if letters else 0.0)
+            self._times.append(timestamp)
+            self._authors.append(self._author_codes.setdefault(author or user, len(self._author_codes)))
+            self._ngram_feature.extend(ngrams)
+            self._ngram_item.extend([item] * len(ngrams))
+            self._posts[post_id] = item
+            self._changed()
+        return item
+
+    def _changed(self):
+        self._scores = None
+
+    def _posting_rates(self):
+        """Returns, per item, how many posts its author made in the RATE_WINDOW_SECONDS up to it."""
+        times = _column(self._times, np.float64)
+        authors = _column(self._authors, np.int32)
+        order = np.lexsort((times, authors))
+        # One sorted key per item: author-major, then time, so a window never spans two authors
+        keys = authors[order] * 1e10 + times[order]
+        rates = np.empty(len(times), dtype=np.int64)
+        rates[order] = np.arange(len(times)) - np.searchsorted(keys, keys - RATE_WINDOW_SECONDS) + 1
+        return rates
+
+    def score(self):
+        """Returns the spam score (0-1) of every item, computed in one vectorized pass and cached."""
+        with self._lock:
+            if self._scores is not None:
+                return self._scores
+            n = len(self.items)
+            weights = np.log(self._spam_counts / self._spam_counts.sum()) - np.log(self._ham_counts / self._ham_counts.sum())
+            features = _column(self._ngram_feature, np.int32)
+            owners = _column(self._ngram_item, np.int32)
+            ngram_total = np.bincount(owners, weights=weights[features], minlength=n)
+            ngram_count = np.bincount(owners, minlength=n)
+            ngram_evidence = ngram_total / np.maximum(ngram_count, 1) # Mean log-odds per n-gram
+            self._rates = self._posting_rates()
+            logit = (
+                _BIAS
+                + _URL_WEIGHT * _column(self._urls, np.float32)
+                + _KEYWORD_WEIGHT * _column(self._keywords, np.float32)
+                + _CAPS_WEIGHT * _column(self._caps, np.float32)
+                + _RATE_WEIGHT * np.maximum(self._rates - _RATE_ALLOWANCE, 0)
+                + ngram_evidence
+            )
+            self._scores = 1 / (1 + np.exp(-logit))
+            return self._scores
+
+    def pending_items(self, kind=None, limit=None):
+        """Returns the numbers of pending items (optionally of one kind), highest spam score first."""
+        scores = self.score()
+        with self._lock:
+            n = len(scores)
+            mask = _column(self._status, np.int8)[:n] == PENDING
+            if kind is not None:
+                mask &= _column(self._kinds, np.int8)[:n] == KINDS.index(kind)
+        rows = np.flatnonzero(mask)
+        rows = rows[np.lexsort((rows, -scores[rows]))] # Highest score first, then oldest
+        return rows[:limit].tolist()
+
+    def frame(self, item_numbers):
+        """Returns the given items as a DataFrame, in the given order.
+
+        Columns: Item (queue item number), Status, Spam Score (%), Type, User, Content,
+        Posted, Links, Keywords and Posts/h (the author's posts in the rate window).
+        """
+        scores = self.score()
+        rows = np.asarray(item_numbers, dtype=np.int64)
+        with self._lock:
+            items = [self.items[row] for row in rows]
+            status = _column(self._status, np.int8)[rows]
+            urls = _column(self._urls, np.float32)[rows]
+            keywords = _column(self._keywords, np.float32)[rows]
+            rates = self._rates[rows]
+        return pd.DataFrame({
+            "Item": rows,
+            "Status": [STATUS_LABELS[code] for code in status.tolist()],
+            "Spam Score (%)": 100 * scores[rows],
+            "Type": [item["kind"] for item in items],
+            "User": [item["user"] for item in items],
+            "Content": [item["text"] for item in items],
+            "Posted": pd.to_datetime([datetime.fromtimestamp(item["timestamp"]) for item in items]),
+            "Links": urls.astype(np.int64),
+            "Keywords": keywords.astype(np.int64),
+            "Posts/h": rates
+        })
+
+    def decide(self, item_numbers, approve):
+        """Approves or rejects pending items in bulk and learns from the decision. Returns how many changed."""
+        with self._lock:
+            status = _column(self._status, np.int8)
+            rows = np.asarray(item_numbers, dtype=np.int64)
+            rows = rows[status[rows] == PENDING] # Already decided (e.g. by another moderator)
+            if not len(rows):
+                return 0
+            for row in rows.tolist():
+                self._status[row] = APPROVED if approve else REJECTED
+            # Add the decided items' n-grams to the spam or ham counts in one scatter-add
+            features = _column(self._ngram_feature, np.int32)
+            owners = _column(self._ngram_item, np.int32)
+            decided = np.zeros(len(self.items), dtype=bool)
+            decided[rows] = True
+            np.add.at(self._ham_counts if approve else self._spam_counts, features[decided[owners]], 1)
+            if not approve:
+                self._rejected_posts.update(self.items[row]["post_id"] for row in rows)
+            self._changed()
+            return len(rows)
+
+    def is_rejected(self, post_id):
+        """True if a moderator rejected the post; such posts are hidden from the feeds."""
+        return post_id in self._rejected_posts
+
+    def counts(self):
+        """Returns the number of pending, approved and rejected items."""
+        with self._lock:
+            totals = np.bincount(_column(self._status, np.int8), minlength=3)
+        return {label: int(totals[status]) for status, label in STATUS_LABELS.items()}
+
+    def __len__(self):
+        return len(self.items)
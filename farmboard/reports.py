@@ -0,0 +1,212 @@
+"""Report rendering and caching for the Sponsor Dashboard's Download Reports section."""
+import io
+import threading
+from collections import OrderedDict
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+from PIL import Image, ImageDraw, ImageFont
+
+REPORT_MIME_TYPES = {"CSV": "text/csv", "PDF": "application/pdf"}
+
+# Rows formatted per CSV chunk
+CSV_CHUNK_ROWS = 50_000
+
+# Rendered reports kept in ReportCache, by count and by total size
+REPORT_CACHE_ENTRIES = 16
+REPORT_CACHE_MAX_BYTES = 128 * 1024 * 1024
+
+# PDF pages are A4 rendered at 100 dpi. Tables beyond MAX_PDF_PAGES are cut (use CSV for full exports).
+PDF_PAGE_SIZE = (827, 1169)
+PDF_MARGIN = 50
+PDF_ROW_HEIGHT = 20
+MAX_PDF_PAGES = 12
+CHART_COLORS = ["#2E7D32", "#1565C0", "#EF6C00", "#6A1B9A", "#C62828", "#00838F"]
+
+
+def frame_version(df):
+    """Returns a content fingerprint of a DataFrame (values and index), used as the data version."""
+    return int(pd.util.hash_pandas_object(df, index=True).sum())
+
+
+def iter_frame_chunks(df, chunk_rows=CSV_CHUNK_ROWS):
+    """Yields consecutive row slices (views) of a DataFrame."""
+    for start in range(0, max(len(df), 1), chunk_rows):
+        yield df.iloc[start:start + chunk_rows]
+
+
+def write_csv_chunks(frames, index=False):
+    """Serializes an iterable of DataFrame chunks as one CSV and returns its bytes.
+
+    Only one chunk is formatted as text at a time, but the result is the whole file:
+    st.download_button holds its full payload in memory, so a large export costs
+    about its CSV size while it is being downloaded (and while it is cached).
+    """
+    out = io.BytesIO()
+    header = True
+    for chunk in frames:
+        out.write(chunk.to_csv(index=index, header=header).encode('utf-8'))
+        header = False
+    return out.getvalue()
+
+
+def _font(size):
+    try:
+        return ImageFont.load_default(size=size)
+    except TypeError: # Pillow builds without FreeType only have the fixed bitmap font
+        return ImageFont.load_default()
+
+
+def _format_cell(value):
+    if isinstance(value, (float, np.floating)):
+        return f"{value:,.2f}"
+    if isinstance(value, pd.Timestamp):
+        return value.strftime("%Y-%m-%d")
+    return str(value)
+
+
+def _draw_line_chart(draw, box, frame):
+    """Draws each numeric column of `frame` as a line across the rows, with a legend."""
+    left, top, right, bottom = box
+    font = _font(12)
+    values = frame.to_numpy(dtype=float)
+    low, high = float(np.nanmin(values)), float(np.nanmax(values))
+    span = (high - low) or 1.0
+    draw.rectangle(box, outline="#9E9E9E")
+    draw.text((left + 4, top + 2), f"{high:,.0f}", fill="#616161", font=font)
+    draw.text((left + 4, bottom - 16), f"{low:,.0f}", fill="#616161", font=font)
+    steps = max(len(frame) - 1, 1)
+    for i, column in enumerate(frame.columns):
+        color = CHART_COLORS[i % len(CHART_COLORS)]
+        points = [
+            (left + (right - left) * row / steps, bottom - (bottom - top) * (value - low) / span)
+            for row, value in enumerate(values[:, i])
+        ]
+        if len(points) > 1:
+            draw.line(points, fill=color, width=2)
+        draw.rectangle((left + 10, bottom + 12 + 18 * i, left + 22, bottom + 24 + 18 * i), fill=color)
+        draw.text((left + 28, bottom + 10 + 18 * i), str(column), fill="black", font=font)
+    return bottom + 20 + 18 * len(frame.columns)
+
+
+def _draw_bar_chart(draw, box, labels, values):
+    """Draws horizontal bars for label/value pairs."""
+    left, top, right, bottom = box
+    font = _font(12)
+    high = max(float(np.nanmax(values)), 1.0) if len(values) else 1.0
+    bar_height = min(24, (bottom - top) / max(len(labels), 1))
+    label_width = 220
+    for i, (label, value) in enumerate(zip(labels, values)):
+        y = top + i * bar_height
+        draw.text((left, y + 4), str(label)[:32], fill="black", font=font)
+        width = (right - left - label_width - 80) * max(float(value), 0.0) / high
+        draw.rectangle((left + label_width, y + 3, left + label_width + width, y + bar_height - 3), fill=CHART_COLORS[i % len(CHART_COLORS)])
+        draw.text((left + label_width + width + 6, y + 4), f"{value:,.0f}", fill="#424242", font=font)
+    return top + len(labels) * bar_height + 10
+
+
+def render_pdf(title, df, index=False, chart=None):
+    """Renders a report as a PDF: title, an optional chart, then the table across pages.
+
+    `chart` is "line" (numeric columns over the rows) or "bar" (first numeric column per
+    row). Drawn with Pillow only, so no PDF toolkit is needed.
+    """
+    table = df.reset_index() if index else df
+    width, height = PDF_PAGE_SIZE
+    title_font, text_font, header_font = _font(22), _font(12), _font(13)
+    columns = [str(c) for c in table.columns]
+    col_width = (width - 2 * PDF_MARGIN) / max(len(columns), 1)
+    max_chars = max(int(col_width / 7), 4)
+
+    pages = []
+    page = Image.new("RGB", PDF_PAGE_SIZE, "white")
+    draw = ImageDraw.Draw(page)
+    draw.text((PDF_MARGIN, PDF_MARGIN), title, fill="#2E7D32", font=title_font)
+    draw.text((PDF_MARGIN, PDF_MARGIN + 32), f"Generated {datetime.now().strftime('%Y-%m-%d %H:%M')} | {len(table):,} rows", fill="#616161", font=text_font)
+    y = PDF_MARGIN + 60
+
+    numeric = df.select_dtypes("number")
+    if chart == "line" and not numeric.empty:
+        y = _draw_line_chart(draw, (PDF_MARGIN, y, width - PDF_MARGIN, y + 300), numeric) + 20
+    elif chart == "bar" and not numeric.empty:
+        labels = df.index if index else df.iloc[:, 0]
+        y = _draw_bar_chart(draw, (PDF_MARGIN, y, width - PDF_MARGIN, y + 300), list(labels), numeric.iloc[:, 0].to_numpy(dtype=float)) + 20
+
+    row = 0
+    values = table.itertuples(index=False)
+    while True:
+        # Header row on every page
+        for c, column in enumerate(columns):
+            draw.text((PDF_MARGIN + c * col_width, y), column[:max_chars], fill="black", font=header_font)
+        y += PDF_ROW_HEIGHT
+        draw.line((PDF_MARGIN, y - 4, width - PDF_MARGIN, y - 4), fill="#9E9E9E")
+        while y < height - PDF_MARGIN - PDF_ROW_HEIGHT:
+            record = next(values, None)
+            if record is None:
+                break
+            for c, value in enumerate(record):
+                draw.text((PDF_MARGIN + c * col_width, y), _format_cell(value)[:max_chars], fill="#212121", font=text_font)
+            y += PDF_ROW_HEIGHT
+            row += 1
+        pages.append(page)
+        if row >= len(table):
+            break
+        if len(pages) == MAX_PDF_PAGES:
+            draw.text((PDF_MARGIN, height - PDF_MARGIN), f"... {len(table) - row:,} more rows; download the CSV for the full data.", fill="#C62828", font=text_font)
+            break
+        page = Image.new("RGB", PDF_PAGE_SIZE, "white")
+        draw = ImageDraw.Draw(page)
+        y = PDF_MARGIN
+
+    buf = io.BytesIO()
+    pages[0].save(buf, "PDF", save_all=True, append_images=pages[1:], resolution=100, title=title)
+    return buf.getvalue()
+
+
+def render_report(report_type, report_format, df, index=False, chart=None):
+    """Serializes one report to bytes (CSV or PDF)."""
+    if report_format == "CSV":
+        return write_csv_chunks(iter_frame_chunks(df), index=index)
+    return render_pdf(report_type, df, index=index, chart=chart)
+
+
+class ReportCache:
+    """Bounded LRU of rendered reports (bytes) keyed by (report type, format, data version).
+
+    Concurrent requests for the same key wait for a single render instead of each
+    serializing the report again. Entries are evicted past `max_entries` or once they
+    hold more than `max_bytes` in total; the newest entry is always kept.
+    """
+
+    def __init__(self, max_entries=REPORT_CACHE_ENTRIES, max_bytes=REPORT_CACHE_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._size = 0
+        self._key_locks = {}
+        self._lock = threading.Lock()
+
+    def get_or_render(self, key, render):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key] # Shared, not copied
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            with self._lock:
+                data = self._entries.get(key) # Rendered by another request while we waited
+            if data is None:
+                data = render()
+                with self._lock:
+                    self._entries[key] = data
+                    self._size += len(data)
+                    self._key_locks.pop(key, None)
+                    while len(self._entries) > 1 and (len(self._entries) > self.max_entries or self._size > self.max_bytes):
+                        self._size -= len(self._entries.popitem(last=False)[1])
+        return data
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
@@ -0,0 +1,88 @@
+"""Incrementally maintained per-campaign aggregates and ROI for the Sponsor Dashboard."""
+import threading
+
+import numpy as np
+import pandas as pd
+
+from farmboard.events import GROWTH_KINDS
+
+# Illustrative value model: each interaction is worth $0.50, each plant put in the ground $10
+VALUE_PER_ENGAGEMENT = 0.5
+VALUE_PER_GROWTH = 10.0
+
+
+class ROIEngine:
+    """Running engagement and growth totals per campaign, held in flat NumPy arrays.
+
+    Events are folded in as they arrive (observe), so computing ROI never re-reads
+    the event history. compute() evaluates every campaign in one vectorized pass and
+    returns plain numeric columns; formatting is left to the caller.
+    """
+
+    def __init__(self, capacity=64):
+        self._names = []
+        self._slots = {} # campaign name -> row
+        self._investment = np.zeros(capacity)
+        self._engagement = np.zeros(capacity)
+        self._growth = np.zeros(capacity)
+        self._investments = {} # Last applied set_investments() argument
+        self._lock = threading.Lock()
+
+    def _slot(self, campaign):
+        slot = self._slots.get(campaign)
+        if slot is None:
+            slot = len(self._names)
+            if slot == len(self._investment): # Grow all arrays by doubling
+                self._investment, self._engagement, self._growth = (
+                    np.concatenate([a, np.zeros(len(a))]) for a in (self._investment, self._engagement, self._growth)
+                )
+            self._names.append(campaign)
+            self._slots[campaign] = slot
+        return slot
+
+    def set_investments(self, investments):
+        """Sets every campaign's investment from {campaign: amount}; a no-op if they are unchanged."""
+        with self._lock:
+            if investments == self._investments:
+                return
+            for campaign, amount in investments.items():
+                self._investment[self._slot(campaign)] = amount
+            self._investments = dict(investments)
+
+    def observe(self, campaign, kind, count=1):
+        """Folds `count` new events of one kind for a campaign into the running totals."""
+        with self._lock:
+            slot = self._slot(campaign)
+            self._engagement[slot] += count
+            if kind in GROWTH_KINDS:
+                self._growth[slot] += count
+
+    def observe_totals(self, engagement, growth):
+        """Folds in bulk totals, e.g. {campaign: count} dicts rolled up from the event log."""
+        with self._lock:
+            slots = np.array([self._slot(c) for c in engagement], dtype=np.int64)
+            np.add.at(self._engagement, slots, np.fromiter(engagement.values(), float, len(engagement)))
+            slots = np.array([self._slot(c) for c in growth], dtype=np.int64)
+            np.add.at(self._growth, slots, np.fromiter(growth.values(), float, len(growth)))
+
+    def reset_totals(self, engagement, growth):
+        """Replaces the running totals with freshly computed ones (see observe_totals)."""
+        with self._lock:
+            self._engagement[:] = 0
+            self._growth[:] = 0
+        self.observe_totals(engagement, growth)
+
+    def compute(self, campaigns=None):
+        """Returns a DataFrame indexed by campaign with float columns for investment, value and ROI (%)."""
+        with self._lock:
+            names = list(self._names) if campaigns is None else list(campaigns)
+            slots = np.array([self._slots.get(c, -1) for c in names], dtype=np.int64)
+            known = slots >= 0
+            rows = np.where(known, slots, 0)
+            investment = np.where(known, self._investment[rows], 0.0)
+            value = np.where(known, self._engagement[rows] * VALUE_PER_ENGAGEMENT + self._growth[rows] * VALUE_PER_GROWTH, 0.0)
+        roi = np.divide((value - investment) * 100, investment, out=np.zeros(len(names)), where=investment > 0)
+        return pd.DataFrame(
+            {"Investment ($)": investment, "Estimated Value ($)": value.round(0), "ROI (%)": roi},
+            index=pd.Index(names, name="Campaign")
+        )
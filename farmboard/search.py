@@ -0,0 +1,149 @@
+"""Full-text search: an in-memory inverted index with BM25 ranking, updated one document at a time."""
+import functools
+import math
+import re
+from array import array
+
+import numpy as np
+
+# BM25 parameters: term-frequency saturation and document-length normalization
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+STOPWORDS = frozenset("""
+a about an and are as at be been but by can could did do does for from had has have how i if in
+is it its just me my no not of on or our so than that the their them then there these they this
+to too up us was we were what when where which who why will with would you your
+""".split())
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_VOWELS = frozenset("aeiouy")
+
+# Plurals that turn -f/-fe into -ves; every other -ves word is the plural of a -ve word ("chives")
+_F_PLURALS = {
+    "calves": "calf", "halves": "half", "knives": "knife", "leaves": "leaf", "lives": "life",
+    "loaves": "loaf", "shelves": "shelf", "thieves": "thief", "wives": "wife", "wolves": "wolf"
+}
+
+# (suffix, replacement), longest first; the first one that leaves a valid stem is applied
+_SUFFIXES = (
+    ("ational", "ate"), ("ization", "ize"), ("fulness", "ful"), ("iveness", "ive"),
+    ("ingly", ""), ("edly", ""), ("sses", "ss"), ("shes", "sh"), ("ches", "ch"),
+    ("xes", "x"), ("ies", "y"), ("ied", "y"), ("oes", "o"), ("ves", "ve"),
+    ("ing", ""), ("ly", ""), ("ed", ""), ("s", "")
+)
+
+
+@functools.lru_cache(maxsize=65536)
+def stem(word):
+    """Reduces an English word to a stem with a light suffix stripper (Porter-style, no dictionary).
+
+    Related forms share a stem ("yellowing", "yellowed" -> "yellow"; "leaves" -> "leaf";
+    "tomatoes" -> "tomato"), which is all ranking needs: stems are never shown.
+    """
+    if len(word) <= 3 or word.isdigit():
+        return word
+    word = _F_PLURALS.get(word, word)
+    for suffix, replacement in _SUFFIXES:
+        if not word.endswith(suffix):
+            continue
+        base = word[:-len(suffix)]
+        if suffix == "s" and base[-1] in "sui": # "grass", "cactus", "basis"
+            break
+        if suffix == "ed" and base.endswith("e"): # "seed", "speed"
+            break
+        if replacement == "y":
+            if len(base) < 2:
+                continue # "ties"
+        elif len(base) < 3 or not _VOWELS.intersection(base):
+            continue # "bring", "red": the suffix is part of the word
+        word = base + replacement
+        if suffix in ("ing", "ed") and len(word) > 3 and word[-1] == word[-2] and word[-1] not in "lsz":
+            word = word[:-1] # "planning" -> "plan", but "falling" -> "fall"
+        break
+    if len(word) > 3 and word.endswith("e"):
+        word = word[:-1] # "move" and "moving" -> "mov"
+    return word
+
+
+def tokenize(text):
+    """Returns the stemmed search terms of `text`: lowercase words without stopwords."""
+    return [stem(token) for token in _TOKEN_RE.findall(text.lower()) if len(token) > 1 and token not in STOPWORDS]
+
+
+class SearchIndex:
+    """Inverted index over short documents (e.g. comments), ranked with Okapi BM25.
+
+    Documents are numbered in the order they are added. Each term keeps its postings
+    (document numbers and term counts) in compact append-only arrays, so add() only
+    touches the terms of the new document and never rebuilds anything. search() scores
+    just the postings of the query's terms with NumPy, so its cost depends on how
+    common those terms are, not on how many documents there are.
+    """
+
+    def __init__(self):
+        self._postings = {} # term -> (array of document numbers, array of term counts)
+        self._lengths = array("i") # Terms per document
+        self._keys = [] # Document number -> caller's key (e.g. post id)
+        self._total_length = 0
+
+    def add(self, key, text):
+        """Indexes `text` as a new document identified by `key`."""
+        doc = len(self._keys)
+        terms = tokenize(text)
+        counts = {}
+        for term in terms:
+            counts[term] = counts.get(term, 0) + 1
+        for term, count in counts.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = (array("i"), array("i"))
+            postings[0].append(doc)
+            postings[1].append(count)
+        self._keys.append(key)
+        self._lengths.append(len(terms))
+        self._total_length += len(terms)
+
+    def search(self, query, limit=20):
+        """Returns (keys of the best `limit` matches, best first, number of matching documents).
+
+        A document matches if it contains any query term; ties go to the newer document.
+        """
+        terms = set(tokenize(query))
+        n = len(self._keys)
+        if not terms or not n:
+            return [], 0
+        average_length = self._total_length / n or 1.0
+        docs, scores = [], []
+        for term in terms:
+            postings = self._postings.get(term)
+            if postings is None:
+                continue
+            term_docs = np.frombuffer(postings[0], dtype=np.int32).copy()
+            tf = np.frombuffer(postings[1], dtype=np.int32).astype(np.float64)
+            lengths = np.frombuffer(self._lengths, dtype=np.int32)[term_docs]
+            idf = math.log(1 + (n - len(term_docs) + 0.5) / (len(term_docs) + 0.5))
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths / average_length)
+            docs.append(term_docs)
+            scores.append(idf * tf * (BM25_K1 + 1) / (tf + norm))
+        if not docs:
+            return [], 0
+        if len(docs) == 1:
+            matched, total = docs[0], scores[0]
+        else:
+            # Sum per-term scores of documents that contain several query terms, over the
+            # union of the postings only (never an array with one slot per document)
+            matched, inverse = np.unique(np.concatenate(docs), return_inverse=True)
+            total = np.bincount(inverse, weights=np.concatenate(scores))
+        if limit < len(matched):
+            # Best `limit` without a full sort, plus everything tied with the last of them,
+            # so the tie-break below (not argpartition) decides which of those are kept
+            cutoff = total[np.argpartition(-total, limit - 1)[limit - 1]]
+            top = np.flatnonzero(total >= cutoff)
+        else:
+            top = np.arange(len(matched))
+        top = top[np.lexsort((-matched[top], -total[top]))][:limit]
+        return [self._keys[doc] for doc in matched[top]], len(matched)
+
+    def __len__(self):
+        return len(self._keys)
@@ -0,0 +1,43 @@
+"""Admin-editable application settings, shared by all sessions and kept in a JSON file."""
+import json
+import os
+import threading
+
+
+class SettingsStore:
+    """Named settings with defaults, held in memory and written through to a JSON file.
+
+    `limits` maps a numeric setting to its (lowest, highest) value; defaults, stored
+    values and new values outside that range are clamped to it.
+    """
+
+    def __init__(self, path, defaults, limits=None):
+        self.path = path
+        self.limits = limits or {}
+        self._values = {name: self._clamp(name, value) for name, value in defaults.items()}
+        self._lock = threading.Lock()
+        try:
+            with open(path) as f:
+                stored = json.load(f)
+        except (OSError, ValueError):
+            stored = {}
+        self._values.update((name, self._clamp(name, value)) for name, value in stored.items() if name in defaults)
+
+    def _clamp(self, name, value):
+        if name not in self.limits:
+            return value
+        low, high = self.limits[name]
+        return min(max(value, low), high)
+
+    def get(self, name):
+        return self._values[name]
+
+    def set(self, name, value):
+        """Changes a setting (clamped to its limits) and saves all settings atomically."""
+        with self._lock:
+            self._values[name] = self._clamp(name, value)
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(self._values, f, indent=2)
+            os.replace(tmp_path, self.path)
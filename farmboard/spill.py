@@ -0,0 +1,147 @@
+"""Memory budget for per-session data: least recently used objects are spilled to disk."""
+import itertools
+import os
+import pickle
+import shutil
+import tempfile
+import threading
+import uuid
+import weakref
+
+from farmboard.sysstats import estimate_sizeof
+
+# Objects smaller than this stay in memory; spilling them would cost more than it saves
+MIN_SPILL_BYTES = 256 * 1024
+
+
+def _process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except (PermissionError, OSError):
+        return True # Exists but owned by someone else, or the check is unsupported
+    return True
+
+
+def _remove_quietly(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+class SpillSlot:
+    """Holds one per-session object: the object itself while in memory, or the path of its pickle.
+
+    Read the object through SpillManager.load, never through `value` directly.
+    `length` is len(object) as of the owner's last rerun, so counts can be shown
+    without reloading a spilled object.
+    """
+
+    def __init__(self, owner, key, value, path):
+        self.owner = owner
+        self.key = key
+        self.value = value
+        self.path = path
+        self.size = 0
+        self.length = len(value) if hasattr(value, "__len__") else None
+        self.spilled = False
+        self.pinned = False
+        self.last_used = 0
+
+
+class SpillManager:
+    """Keeps per-session objects within a per-session and a process-wide memory budget.
+
+    Sessions read their objects with load(), which reloads spilled ones and pins them
+    for the rest of the rerun. At the end of every rerun, release() unpins the session's
+    objects, re-estimates their sizes and spills least recently used unpinned objects
+    (larger than MIN_SPILL_BYTES) until the session, and then the whole process, is
+    within budget. Idle and abandoned sessions are the least recently used, so they
+    go to disk first. Spill files are deleted when the object is reloaded or its
+    session is dropped.
+    """
+
+    def __init__(self, root, session_budget, global_budget, min_spill_bytes=MIN_SPILL_BYTES):
+        self.session_budget = session_budget
+        self.global_budget = global_budget
+        self.min_spill_bytes = min_spill_bytes
+        self._slots = weakref.WeakSet()
+        self._clock = itertools.count(1)
+        self._lock = threading.RLock()
+        os.makedirs(root, exist_ok=True)
+        # Spill directories of exited processes are unreachable; other live processes keep theirs
+        for name in os.listdir(root):
+            pid = name.split("-", 1)[0]
+            if pid.isdigit() and not _process_alive(int(pid)):
+                shutil.rmtree(os.path.join(root, name), ignore_errors=True)
+        self.directory = tempfile.mkdtemp(prefix=f"{os.getpid()}-", dir=root)
+
+    def slot(self, owner, key, value):
+        """Registers `value` as session `owner`'s object `key` and returns its slot."""
+        slot = SpillSlot(owner, key, value, os.path.join(self.directory, f"{uuid.uuid4().hex}.pkl"))
+        slot.size = estimate_sizeof(value)
+        slot.last_used = next(self._clock)
+        weakref.finalize(slot, _remove_quietly, slot.path) # Session expired: drop its spill file
+        with self._lock:
+            self._slots.add(slot)
+        return slot
+
+    def load(self, slot):
+        """Returns the slot's object, reloading it from disk if it was spilled, and pins it."""
+        with self._lock:
+            if slot.spilled:
+                with open(slot.path, "rb") as f:
+                    slot.value = pickle.load(f)
+                slot.spilled = False
+                _remove_quietly(slot.path)
+            slot.pinned = True
+            slot.last_used = next(self._clock)
+            return slot.value
+
+    def release(self, owner):
+        """Ends `owner`'s rerun: unpins its objects, updates their sizes and enforces the budgets."""
+        with self._lock:
+            slots = list(self._slots)
+            for slot in slots:
+                if slot.owner == owner and slot.pinned:
+                    slot.pinned = False
+                    slot.size = estimate_sizeof(slot.value)
+                    slot.length = len(slot.value) if hasattr(slot.value, "__len__") else None
+            resident = [slot for slot in slots if not slot.spilled]
+            self._enforce([slot for slot in resident if slot.owner == owner], self.session_budget)
+            self._enforce([slot for slot in resident if not slot.spilled], self.global_budget)
+
+    def _enforce(self, resident, budget):
+        total = sum(slot.size for slot in resident)
+        candidates = sorted(
+            (slot for slot in resident if not slot.pinned and slot.size >= self.min_spill_bytes),
+            key=lambda slot: slot.last_used
+        )
+        for slot in candidates:
+            if total <= budget:
+                break
+            self._spill(slot)
+            total -= slot.size
+
+    def _spill(self, slot):
+        tmp_path = slot.path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump(slot.value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, slot.path)
+        slot.value = None
+        slot.spilled = True
+
+    def stats(self):
+        """Returns estimated resident and spilled bytes and object counts across all sessions."""
+        with self._lock:
+            slots = list(self._slots)
+        resident = [slot for slot in slots if not slot.spilled]
+        spilled = [slot for slot in slots if slot.spilled]
+        return {
+            "resident_bytes": sum(slot.size for slot in resident),
+            "resident_objects": len(resident),
+            "spilled_bytes": sum(slot.size for slot in spilled),
+            "spilled_objects": len(spilled)
+        }
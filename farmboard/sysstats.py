@@ -0,0 +1,115 @@
+"""Measurements of process memory and of how much memory session data holds."""
+import os
+import sys
+import types
+
+import numpy as np
+import pandas as pd
+
+# Objects shared by every session (modules, classes, functions) are not attributed to one
+_SHARED_TYPES = (type, types.ModuleType, types.FunctionType, types.BuiltinFunctionType, types.MethodType)
+
+
+def deep_sizeof(obj, seen=None):
+    """Estimates the bytes reachable from `obj`, counting each object once.
+
+    Walks containers and instance attributes iteratively. NumPy arrays count their
+    buffer (views count only their header) and pandas objects use memory_usage(deep=True).
+    Objects whose ids are in `seen` are skipped; ids of the objects walked are added to it.
+    """
+    seen = set() if seen is None else seen
+    stack = [obj]
+    total = 0
+    while stack:
+        item = stack.pop()
+        if id(item) in seen or isinstance(item, _SHARED_TYPES):
+            continue
+        seen.add(id(item))
+        if isinstance(item, np.ndarray):
+            total += sys.getsizeof(item) # Includes the buffer only when the array owns it
+            if item.dtype == object:
+                stack.extend(item.ravel())
+            continue
+        if isinstance(item, pd.DataFrame):
+            total += int(item.memory_usage(deep=True).sum())
+            continue
+        if isinstance(item, (pd.Series, pd.Index)):
+            total += int(item.memory_usage(deep=True))
+            continue
+        total += sys.getsizeof(item)
+        if isinstance(item, (str, bytes, bytearray, int, float, bool, type(None))):
+            continue
+        if isinstance(item, dict):
+            stack.extend(item.keys())
+            stack.extend(item.values())
+        elif isinstance(item, (list, tuple, set, frozenset)):
+            stack.extend(item)
+        if hasattr(item, "__dict__"):
+            stack.append(vars(item))
+        for slot in getattr(type(item), "__slots__", ()):
+            if hasattr(item, slot):
+                stack.append(getattr(item, slot))
+    return total
+
+
+def estimate_sizeof(obj, sample_size=32, seen=None):
+    """Estimates deep_sizeof(obj), sampling large lists and dicts instead of walking them.
+
+    A list, tuple or dict with more than `sample_size` items is measured from an evenly
+    spaced sample of them. Other objects with attributes (e.g. PostFeed, whose posts,
+    position index and search index are all attributes) are estimated attribute by
+    attribute, so nothing they hold besides their items is missed. The rest is measured
+    exactly. This keeps it cheap enough to call on every rerun.
+    """
+    seen = set() if seen is None else seen
+    exact_types = (str, bytes, bytearray, np.ndarray, pd.DataFrame, pd.Series, pd.Index)
+    if isinstance(obj, exact_types) or isinstance(obj, _SHARED_TYPES):
+        return deep_sizeof(obj, seen)
+    if isinstance(obj, (list, tuple, dict)):
+        n = len(obj)
+        if n <= sample_size:
+            return deep_sizeof(obj, seen)
+        items = list(obj) if isinstance(obj, dict) else obj
+        step = n / sample_size
+        sample = [items[int(i * step)] for i in range(sample_size)]
+        # One `seen` for the whole estimate: keys and values the items share (dict keys, small
+        # ints) count once, and parallel collections (posts, their ids in an index) sample the
+        # same positions, so the objects they share are not counted twice
+        if isinstance(obj, dict):
+            per_item = sum(deep_sizeof(key, seen) + deep_sizeof(obj[key], seen) for key in sample) / sample_size
+        else:
+            per_item = sum(deep_sizeof(item, seen) for item in sample) / sample_size
+        return sys.getsizeof(obj) + int(per_item * n)
+    if hasattr(obj, "__dict__"):
+        attributes = vars(obj)
+        return sys.getsizeof(obj) + sys.getsizeof(attributes) + sum(estimate_sizeof(value, sample_size, seen) for value in attributes.values())
+    return deep_sizeof(obj, seen)
+
+
+def state_sizes(state, known=None):
+    """Returns {key: size in bytes} for a mapping such as a session's state.
+
+    Sizes in `known` (e.g. tracked by a SpillManager) are used as they are; other values
+    are measured with estimate_sizeof, so large collections are sampled, not walked.
+    """
+    known = known or {}
+    return {key: known[key] if key in known else estimate_sizeof(value) for key, value in list(state.items())}
+
+
+def process_rss_bytes():
+    """Returns the process's resident set size, or None where it cannot be measured.
+
+    Reads /proc/self/statm on Linux. Elsewhere it falls back to the peak RSS from
+    getrusage (the current RSS is not available there).
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+    except ImportError: # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024 # macOS reports bytes, Linux KiB
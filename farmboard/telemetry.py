@@ -0,0 +1,227 @@
+"""Billboard sensor telemetry: an asyncio HTTP ingestion endpoint feeding per-billboard ring buffers."""
+import asyncio
+import json
+import math
+import threading
+import time
+import warnings
+
+import numpy as np
+
+# Sensor channels stored per reading; a reading may omit any of them (stored as NaN)
+SENSORS = ("temperature", "humidity", "sunlight", "soil_moisture", "water_level")
+SENSOR_UNITS = {"temperature": "°C", "humidity": "%", "sunlight": "lux", "soil_moisture": "%", "water_level": "%"}
+
+# Readings kept per billboard (at one reading per 5 s, a little under 6 hours)
+RING_CAPACITY = 4096
+
+# Largest accepted request body
+MAX_BODY_BYTES = 1024 * 1024
+
+# Readings stamped further ahead of this server's clock are rejected (a wrong clock, or milliseconds
+# sent as seconds); stored, they would hold back every later reading from the billboard
+MAX_CLOCK_SKEW_SECONDS = 300
+
+
+class RingBuffer:
+    """Fixed-size ring of timestamped sensor readings, one writer, any number of lock-free readers.
+
+    The writer announces the rows it is about to overwrite (`_started`) before touching
+    them, and publishes them (`_written`) afterwards. A reader copies the published rows
+    and then discards any that the writer may have started overwriting in the meantime.
+    Reads therefore never block on ingestion and never see a torn row.
+    """
+
+    def __init__(self, capacity=RING_CAPACITY, channels=len(SENSORS)):
+        self.capacity = capacity
+        self._times = np.zeros(capacity, dtype=np.float64)
+        self._values = np.full((capacity, channels), np.nan, dtype=np.float32)
+        self._started = 0 # Rows the writer has begun writing (total since creation)
+        self._written = 0 # Rows fully written and visible to readers
+
+    def append(self, times, values):
+        """Appends readings (sorted by time; only called from the ingestion thread)."""
+        times = np.asarray(times, dtype=np.float64)[-self.capacity:]
+        values = np.asarray(values, dtype=np.float32)[-self.capacity:]
+        start = self._written
+        self._started = start + len(times)
+        positions = np.arange(start, start + len(times)) % self.capacity
+        self._times[positions] = times
+        self._values[positions] = values
+        self._written = self._started
+
+    @property
+    def last_time(self):
+        return self._times[(self._written - 1) % self.capacity] if self._written else -math.inf
+
+    def snapshot(self, rows=None):
+        """Returns (times, values) copies of the newest `rows` readings (default all held), oldest first."""
+        written = self._written
+        count = min(written, self.capacity, self.capacity if rows is None else rows)
+        positions = np.arange(written - count, written) % self.capacity
+        times, values = self._times[positions], self._values[positions]
+        # Rows the writer started replacing while we copied may be torn; drop them
+        valid = min(max(self._started - self.capacity - (written - count), 0), count)
+        return times[valid:], values[valid:]
+
+    def latest(self):
+        """Returns the newest reading as (time, {sensor: value}), or None if there is none."""
+        times, values = self.snapshot(rows=1)
+        if not len(times):
+            return None
+        return float(times[0]), dict(zip(SENSORS, values[0].tolist()))
+
+    def window(self, seconds, now=None):
+        """Returns (times, values) of the readings from the last `seconds`."""
+        times, values = self.snapshot()
+        start = np.searchsorted(times, (now or time.time()) - seconds)
+        return times[start:], values[start:]
+
+    def aggregate(self, seconds, now=None):
+        """Returns {sensor: {"mean", "min", "max"}} over the last `seconds`, plus "count" (readings)."""
+        times, values = self.window(seconds, now)
+        result = {"count": len(times)}
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning) # Sensors without readings in the window
+            means = np.nanmean(values, axis=0) if len(times) else np.full(len(SENSORS), np.nan)
+            lows = np.nanmin(values, axis=0) if len(times) else means
+            highs = np.nanmax(values, axis=0) if len(times) else means
+        for i, sensor in enumerate(SENSORS):
+            result[sensor] = {"mean": float(means[i]), "min": float(lows[i]), "max": float(highs[i])}
+        return result
+
+    def __len__(self):
+        return min(self._written, self.capacity)
+
+
+class TelemetryStore:
+    """Per-billboard ring buffers for a fixed set of billboards.
+
+    Written only by the ingestion thread; read from anywhere without locks.
+    """
+
+    def __init__(self, billboards, capacity=RING_CAPACITY, max_clock_skew=MAX_CLOCK_SKEW_SECONDS):
+        self.allowed = frozenset(billboards)
+        self.capacity = capacity
+        self.max_clock_skew = max_clock_skew
+        self._buffers = {}
+
+    def ingest(self, billboard, readings):
+        """Stores a batch of reading dicts ({"ts": epoch seconds, <sensor>: value, ...}). Returns how many were kept.
+
+        Readings are sorted by time, and any not newer than the billboard's latest
+        stored reading are dropped, so every buffer stays in time order. Raises ValueError,
+        storing nothing, for an unknown billboard or a reading stamped in the future.
+        """
+        if billboard not in self.allowed:
+            raise ValueError(f"unknown billboard {billboard!r}")
+        now = time.time()
+        times = np.array([float(reading.get("ts", now)) for reading in readings], dtype=np.float64)
+        if len(times) and not (np.isfinite(times).all() and times.max() <= now + self.max_clock_skew):
+            raise ValueError("reading timestamps must be epoch seconds, not in the future")
+        values = np.array(
+            [[float(reading[sensor]) if reading.get(sensor) is not None else np.nan for sensor in SENSORS] for reading in readings],
+            dtype=np.float32
+        ).reshape(len(readings), len(SENSORS))
+        buffer = self._buffers.get(billboard)
+        if buffer is None:
+            buffer = RingBuffer(self.capacity)
+            self._buffers = {**self._buffers, billboard: buffer} # Swap in a new dict; readers never see a resize
+        order = np.argsort(times, kind="stable")
+        keep = order[times[order] > buffer.last_time]
+        if len(keep):
+            buffer.append(times[keep], values[keep])
+        return len(keep)
+
+    def buffer(self, billboard):
+        """Returns the billboard's RingBuffer, or None if nothing was received for it yet."""
+        return self._buffers.get(billboard)
+
+    def billboards(self):
+        return list(self._buffers)
+
+
+class TelemetryServer:
+    """Minimal asyncio HTTP/1.1 endpoint, run on its own thread and event loop.
+
+    POST /readings with a JSON body {"billboard": name, "readings": [{"ts": ..., <sensor>: ...}]}
+    stores the batch and answers 202 {"accepted": n}, or 400 if the store refuses it. GET /health answers 200 with the
+    billboards seen so far. Connections are kept alive, so a sender can stream batches.
+    All writes to the store happen on this server's thread (see RingBuffer).
+    """
+
+    def __init__(self, store, host="127.0.0.1", port=8765):
+        self.store = store
+        self.host = host
+        self.port = port
+        self.error = None
+        self._started = threading.Event()
+
+    def start(self):
+        """Starts serving from a daemon thread. Returns self; check `error` if the port was taken."""
+        threading.Thread(target=self._run, name="telemetry-http", daemon=True).start()
+        self._started.wait(timeout=5)
+        return self
+
+    def _run(self):
+        loop = asyncio.new_event_loop()
+        try:
+            server = loop.run_until_complete(asyncio.start_server(self._handle, self.host, self.port))
+        except OSError as e:
+            self.error = e
+            self._started.set()
+            loop.close()
+            return
+        self.port = server.sockets[0].getsockname()[1] # The actual port if 0 was requested
+        self._started.set()
+        loop.run_forever()
+
+    async def _handle(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, path, _ = request_line.decode("latin-1").split(" ", 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                length = int(headers.get("content-length", 0))
+                if length > MAX_BODY_BYTES:
+                    await self._respond(writer, 413, {"error": "body too large"}, close=True)
+                    break
+                body = await reader.readexactly(length) if length else b""
+                status, payload = self._route(method, path.split("?", 1)[0], body)
+                close = headers.get("connection", "").lower() == "close"
+                await self._respond(writer, status, payload, close)
+                if close:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass # Malformed request or the client went away
+        finally:
+            writer.close()
+
+    def _route(self, method, path, body):
+        if method == "POST" and path == "/readings":
+            try:
+                batch = json.loads(body)
+                accepted = self.store.ingest(str(batch["billboard"]), list(batch["readings"]))
+            except (ValueError, KeyError, TypeError, AttributeError) as e:
+                return 400, {"error": f"invalid batch: {e}"}
+            return 202, {"accepted": accepted}
+        if method == "GET" and path == "/health":
+            return 200, {"billboards": self.store.billboards()}
+        return 404, {"error": "not found"}
+
+    async def _respond(self, writer, status, payload, close=False):
+        body = json.dumps(payload).encode("utf-8")
+        reason = {200: "OK", 202: "Accepted", 400: "Bad Request", 404: "Not Found", 413: "Payload Too Large"}[status]
+        writer.write(
+            f"HTTP/1.1 {status} {reason}\r\nContent-Type: application/json\r\nContent-Length: {len(body)}\r\n"
+            f"Connection: {'close' if close else 'keep-alive'}\r\n\r\n".encode("latin-1") + body
+        )
+        await writer.drain()
@@ -0,0 +1,128 @@
+"""Farmboard sensor simulator: posts batched, plausible readings to the telemetry endpoint.
+
+    python -m farmboard.telemetry_sim --port 8765 --billboards "Grow Your Greens,Food Waste Awareness"
+
+Each simulated billboard takes a reading every `--sample-every` seconds and sends them
+in batches every `--interval` seconds over one keep-alive connection, like a board
+with a small local buffer would.
+"""
+import argparse
+import asyncio
+import json
+import math
+import random
+import threading
+import time
+
+
+class SimulatedBoard:
+    """One farmboard: daily temperature/light cycles, a drying soil and a draining water tank."""
+
+    def __init__(self, name, seed=None):
+        self.name = name
+        self.rng = random.Random(seed if seed is not None else name)
+        self.temperature_offset = self.rng.uniform(-3, 3)
+        self.soil_moisture = self.rng.uniform(40, 80)
+        self.water_level = self.rng.uniform(40, 100)
+
+    def reading(self, ts, dt):
+        """Returns the reading at epoch time `ts`, `dt` seconds after the previous one."""
+        hour = time.localtime(ts).tm_hour + time.localtime(ts).tm_min / 60
+        daylight = max(0.0, math.sin(math.pi * (hour - 6) / 12)) # 0 at night, 1 at noon
+        temperature = 17 + 9 * daylight + self.temperature_offset + self.rng.gauss(0, 0.3)
+        # Soil dries faster in the sun; the board waters itself from the tank when it gets dry
+        self.soil_moisture -= dt * (0.002 + 0.006 * daylight) * self.rng.uniform(0.5, 1.5)
+        if self.soil_moisture < 30 and self.water_level > 5:
+            self.soil_moisture += 35
+            self.water_level -= 4
+        self.water_level -= dt * 0.0005
+        if self.water_level < 10 and self.rng.random() < 0.01:
+            self.water_level = 100.0 # Tank refilled by a volunteer
+        return {
+            "ts": ts,
+            "temperature": round(temperature, 2),
+            "humidity": round(min(100.0, max(20.0, 75 - 25 * daylight + self.rng.gauss(0, 2))), 1),
+            "sunlight": round(max(0.0, 60000 * daylight * self.rng.uniform(0.6, 1.0)), 0),
+            "soil_moisture": round(max(0.0, min(100.0, self.soil_moisture)), 1),
+            "water_level": round(max(0.0, self.water_level), 1)
+        }
+
+
+async def _post(reader, writer, host, payload):
+    """Sends one POST /readings on an open connection and returns the response status."""
+    body = json.dumps(payload).encode("utf-8")
+    writer.write(
+        f"POST /readings HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n\r\n".encode("latin-1") + body
+    )
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        if name.strip().lower() == "content-length":
+            length = int(value)
+    await reader.readexactly(length)
+    return status
+
+
+async def run_board(board, host, port, interval=5.0, sample_every=1.0, stop=None):
+    """Samples one board and posts its readings in batches until `stop` (a threading.Event) is set."""
+    pending = []
+    last = time.time()
+    connection = None
+    while stop is None or not stop.is_set():
+        next_send = time.time() + interval
+        while time.time() < next_send:
+            now = time.time()
+            pending.append(board.reading(now, now - last))
+            last = now
+            await asyncio.sleep(sample_every)
+        try:
+            if connection is None:
+                connection = await asyncio.open_connection(host, port)
+            await _post(*connection, host, {"billboard": board.name, "readings": pending})
+            pending = []
+        except (OSError, ValueError, IndexError, asyncio.IncompleteReadError):
+            connection = None # Endpoint not up (yet) or restarted: keep the batch and retry
+            pending = pending[-1000:]
+
+
+async def simulate(host, port, billboards, interval=5.0, sample_every=1.0, stop=None):
+    """Runs one simulated board per billboard name concurrently."""
+    await asyncio.gather(*(
+        run_board(SimulatedBoard(name), host, port, interval, sample_every, stop) for name in billboards
+    ))
+
+
+def start_simulator(host, port, billboards, interval=5.0, sample_every=1.0):
+    """Runs the simulator on a daemon thread with its own event loop. Returns a threading.Event that stops it."""
+    stop = threading.Event()
+    threading.Thread(
+        target=lambda: asyncio.run(simulate(host, port, billboards, interval, sample_every, stop)),
+        name="telemetry-simulator",
+        daemon=True
+    ).start()
+    return stop
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--billboards", default="Grow Your Greens,From Message to Meal,Food Waste Awareness,Urban Farming Revolution",
+                        help="Comma-separated billboard names")
+    parser.add_argument("--interval", type=float, default=5.0, help="Seconds between batches")
+    parser.add_argument("--sample-every", type=float, default=1.0, help="Seconds between readings")
+    args = parser.parse_args()
+    try:
+        asyncio.run(simulate(args.host, args.port, args.billboards.split(","), args.interval, args.sample_every))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
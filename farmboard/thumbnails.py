@@ -0,0 +1,93 @@
+"""Thumbnail generation for the Photo Wall, run in a worker process pool shared with upload ingestion."""
+import io
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from PIL import Image, ImageOps
+
+THUMBNAIL_WIDTHS = (320, 640)
+
+
+def image_worker_pool(max_workers=2):
+    """Returns the process pool that ThumbnailPipeline and IngestPipeline submit image work to."""
+    # "spawn" keeps workers independent of the threads running in the Streamlit server
+    return ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn"))
+
+
+def derivative_name(width):
+    """Name under which a thumbnail of the given width is kept in the media store."""
+    return f"w{width}.webp"
+
+
+def render_thumbnails(source, widths=THUMBNAIL_WIDTHS, quality=80):
+    """Decodes an image once and returns {width: WebP bytes} for each target width.
+
+    `source` is a file path or raw bytes. Runs inside a worker process, so it must stay
+    a plain module-level function.
+    """
+    with Image.open(io.BytesIO(source) if isinstance(source, bytes) else source) as img:
+        img = ImageOps.exif_transpose(img) # Respect phone camera orientation
+        if img.mode not in ("RGB", "RGBA"):
+            img = img.convert("RGB")
+        thumbnails = {}
+        # Go from the largest width down so each resize starts from a smaller image
+        current = img
+        for width in sorted(widths, reverse=True):
+            if current.width > width:
+                current = current.resize((width, max(1, round(current.height * width / current.width))), Image.LANCZOS)
+            buf = io.BytesIO()
+            current.save(buf, "WEBP", quality=quality)
+            thumbnails[width] = buf.getvalue()
+    return thumbnails
+
+
+class ThumbnailPipeline:
+    """Makes thumbnails for stored media in a process pool and caches them by content digest."""
+
+    def __init__(self, store, executor, widths=THUMBNAIL_WIDTHS):
+        self.store = store
+        self.widths = tuple(widths)
+        self._executor = executor # See image_worker_pool()
+        self._pending = {} # digest -> Future
+        self._failed = set() # Digests Pillow could not decode; never retried
+        self._lock = threading.Lock()
+
+    def submit(self, digest):
+        """Queues thumbnail generation for a stored blob. Returns the Future, or None if nothing to do."""
+        with self._lock:
+            if digest in self._pending:
+                return self._pending[digest]
+            if digest in self._failed or self._is_complete(digest):
+                return None
+            # Hand workers a path when the backend has one, so the bytes are not pickled across
+            path = getattr(self.store, "path", None)
+            source = path(digest) if path else self.store.read(digest)
+            future = self._executor.submit(render_thumbnails, source, self.widths)
+            self._pending[digest] = future
+        future.add_done_callback(lambda f: self._store_results(digest, f))
+        return future
+
+    def _is_complete(self, digest):
+        return all(self.store.read_derivative(digest, derivative_name(w)) is not None for w in self.widths)
+
+    def _store_results(self, digest, future):
+        try:
+            for width, data in future.result().items():
+                self.store.put_derivative(digest, derivative_name(width), data)
+        except Exception:
+            with self._lock:
+                self._failed.add(digest)
+        finally:
+            with self._lock:
+                self._pending.pop(digest, None)
+
+    def is_pending(self, digest):
+        return digest in self._pending
+
+    def thumbnail(self, digest, width):
+        """Returns the cached thumbnail bytes, or None (queuing generation) if not ready yet."""
+        data = self.store.read_derivative(digest, derivative_name(width))
+        if data is None:
+            self.submit(digest)
+        return data
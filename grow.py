@@ -1,10 +1,35 @@
 import streamlit as st
-from datetime import datetime
+from streamlit import runtime
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+from datetime import datetime, timedelta
 import random
 import pandas as pd
 import numpy as np
-import time
+import functools
 import io
+import os
+import threading
+
+from farmboard.assets import BillboardAssets
+from farmboard.counters import CounterService
+from farmboard.dedup import PhotoIndex, dhash
+from farmboard.events import EVENT_KINDS, GROWTH_KINDS, SECONDS_PER_DAY, EventLog, to_epoch_seconds
+from farmboard.feed import PostFeed
+from farmboard.garden import HARVEST_READY, SPECIES, Garden, PlantHistory
+from farmboard.ingest import INGEST_MAX_SIDE, INGEST_QUALITY, IngestPipeline
+from farmboard.jobs import JobScheduler
+from farmboard.maintenance import backup_data, clear_caches, recalculate_statistics
+from farmboard.media import DiskMediaStore
+from farmboard.metrics import MetricsRegistry
+from farmboard.moderation import ModerationQueue
+from farmboard.reports import REPORT_MIME_TYPES, ReportCache, frame_version, render_pdf, render_report, write_csv_chunks
+from farmboard.roi import ROIEngine
+from farmboard.settings import SettingsStore
+from farmboard.spill import SpillManager, SpillSlot
+from farmboard.sysstats import process_rss_bytes, state_sizes
+from farmboard.telemetry import SENSOR_UNITS, TelemetryServer, TelemetryStore
+from farmboard.telemetry_sim import start_simulator
+from farmboard.thumbnails import ThumbnailPipeline, image_worker_pool
 
 # ------ PAGE CONFIGURATION ------
 st.set_page_config(
@@ -62,6 +87,147 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+# ------ STORAGE ------
+# Local directory for data that outlives a session (uploaded media, etc.)
+DATA_DIR = os.environ.get("GROW_DATA_DIR", "data")
+
+@st.cache_resource
+def get_media_store():
+    """Returns the process-wide media store shared by all sessions."""
+    return DiskMediaStore(os.path.join(DATA_DIR, "media"))
+
+# Admin-editable settings and their defaults (see Admin > Settings & Maintenance)
+DEFAULT_SETTINGS = {
+    "max_upload_mb": int(os.environ.get("GROW_MAX_UPLOAD_MB", 15)) # Phone photos are typically 8-12 MB
+}
+# server.maxUploadSize in .streamlit/config.toml is the hard cap for uploads
+SETTING_LIMITS = {
+    "max_upload_mb": (1, st.get_option("server.maxUploadSize"))
+}
+
+@st.cache_resource
+def get_settings():
+    """Returns the process-wide settings, persisted in the data directory."""
+    return SettingsStore(os.path.join(DATA_DIR, "settings.json"), DEFAULT_SETTINGS, SETTING_LIMITS)
+
+# Width of the thumbnails shown in the 3-column Photo Wall grid
+PHOTO_GRID_THUMB_WIDTH = 640
+
+@st.cache_resource
+def get_image_workers():
+    """Returns the process-wide worker pool for thumbnails and upload ingestion."""
+    return image_worker_pool()
+
+@st.cache_resource
+def get_thumbnail_pipeline():
+    """Returns the process-wide thumbnail pipeline."""
+    return ThumbnailPipeline(get_media_store(), get_image_workers())
+
+@st.cache_resource
+def get_impact_counters():
+    """Returns the impact counters shared by all sessions (seeded with example values on first run)."""
+    return CounterService(
+        {
+            "plants_grown": random.randint(1000, 1500),
+            "co2_offset": random.randint(300, 500),
+            "seed_kits": random.randint(700, 1000)
+        },
+        db_path=os.path.join(DATA_DIR, "counters.sqlite3")
+    )
+
+# Campaign credited with community activity (likes, uploads) when no campaign was viewed yet
+UNATTRIBUTED_CAMPAIGN = "Unattributed"
+
+# Set GROW_EXAMPLE_EVENTS=0 to start the dashboards from recorded events only
+EXAMPLE_EVENTS = os.environ.get("GROW_EXAMPLE_EVENTS", "1") != "0"
+
+@st.cache_resource
+def get_event_log():
+    """Returns the shared engagement event log, plus 30 days of in-memory example history unless disabled."""
+    log = EventLog(os.path.join(DATA_DIR, "events"))
+    if EXAMPLE_EVENTS:
+        campaign_weights = {"Grow Your Greens": 1.5, "From Message to Meal": 1.2, "Food Waste Awareness": 0.8, "Urban Farming Revolution": 1.0}
+        rng = np.random.default_rng()
+        first_day = to_epoch_seconds(datetime.now().date()) - 29 * SECONDS_PER_DAY
+        # Events per (day, campaign), simulating different campaign effectiveness
+        counts = (rng.integers(10, 100, size=(30, len(campaign_weights))) * list(campaign_weights.values())).astype(int).ravel()
+        names = np.array(list(campaign_weights), dtype=object)
+        days = np.repeat(np.repeat(np.arange(30), len(names)), counts)
+        campaigns = np.repeat(np.tile(names, 30), counts)
+        timestamps = first_day + days * SECONDS_PER_DAY + rng.integers(0, SECONDS_PER_DAY, size=len(days))
+        kinds = rng.choice(EVENT_KINDS, size=len(days), p=[0.3, 0.2, 0.4, 0.1])
+        log.add_examples(kinds, campaigns, timestamps) # Never written to disk or exported
+    return log
+
+@st.cache_resource
+def get_roi_engine():
+    """Returns the shared ROI engine, bootstrapped once from the event log's all-time totals."""
+    engine = ROIEngine()
+    log = get_event_log()
+    engine.observe_totals(log.totals(), log.totals(kinds=GROWTH_KINDS))
+    return engine
+
+def record_event(kind, campaign=None):
+    """Appends an engagement event, crediting the last campaign viewed on Home if none is given."""
+    campaign = campaign or st.session_state.get("campaign_select") or UNATTRIBUTED_CAMPAIGN
+    engine = get_roi_engine() # Build (and bootstrap from the log) before appending, or the event counts twice
+    get_event_log().append(kind, campaign)
+    engine.observe(campaign, kind) # Keep running ROI aggregates current
+
+# Memory budgets for per-session data; above them, least recently used data is spilled to disk
+SESSION_MEMORY_BUDGET_MB = int(os.environ.get("GROW_SESSION_MEMORY_MB", "64"))
+GLOBAL_MEMORY_BUDGET_MB = int(os.environ.get("GROW_MEMORY_BUDGET_MB", "1024"))
+
+# Session state keys whose (potentially large) values are held in spill slots; read them with session_data()
+SPILLABLE_KEYS = ("uploads", "comments", "user_plants", "user_plant_history")
+
+@st.cache_resource
+def get_spill_manager():
+    """Returns the process-wide manager that keeps session data within the memory budgets."""
+    return SpillManager(os.path.join(DATA_DIR, "spill"), SESSION_MEMORY_BUDGET_MB * 1e6, GLOBAL_MEMORY_BUDGET_MB * 1e6)
+
+def session_owner():
+    """Returns the id of the session running this script."""
+    ctx = get_script_run_ctx()
+    return ctx.session_id if ctx else "local"
+
+def session_data(key):
+    """Returns this session's object for one of SPILLABLE_KEYS, reloading it from disk if it was spilled."""
+    return get_spill_manager().load(st.session_state[key])
+
+# Nesting depth of session fragments running on this script thread
+_fragment_depth = threading.local()
+
+def session_fragment(func):
+    """Like st.fragment, for fragments that read session_data.
+
+    A fragment-only rerun never reaches the release in main(), so the outermost
+    fragment releases this session's data itself when such a rerun ends.
+    """
+    @functools.wraps(func) # st.fragment derives the fragment id from the function's name
+    def run(*args, **kwargs):
+        _fragment_depth.value = getattr(_fragment_depth, "value", 0) + 1
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _fragment_depth.value -= 1
+            ctx = get_script_run_ctx()
+            if _fragment_depth.value == 0 and ctx and ctx.fragment_ids_this_run:
+                get_spill_manager().release(session_owner())
+    return st.fragment(run)
+
+# ------ INSTRUMENTATION ------
+# Set GROW_METRICS_PORT to also serve the timings at http://127.0.0.1:<port>/metrics
+METRICS_PORT = os.environ.get("GROW_METRICS_PORT")
+
+@st.cache_resource
+def get_metrics():
+    """Returns the process-wide render timing histograms (page.* and section timings)."""
+    metrics = MetricsRegistry()
+    if METRICS_PORT:
+        metrics.serve(int(METRICS_PORT))
+    return metrics
+
 # ------ AUTHENTICATION (REMOVED) ------
 # The setup_authentication function has been removed.
 # We will use session state to simulate the user role.
@@ -71,35 +237,35 @@ def initialize_data():
     """Initializes session state variables and static data."""
     # Initialize session state variables if they don't exist
     if "comments" not in st.session_state:
-        st.session_state["comments"] = []
+        st.session_state["comments"] = PostFeed(search_field="comment") # Indexed for the forum search box
         st.session_state["comments_initialized"] = False # Flag for sample comments
 
     if "uploads" not in st.session_state:
-        st.session_state["uploads"] = []
-
-    if "plants_grown" not in st.session_state:
-        st.session_state["plants_grown"] = random.randint(1000, 1500)
-
-    if "co2_offset" not in st.session_state:
-        st.session_state["co2_offset"] = random.randint(300, 500)
-
-    if "seed_kits" not in st.session_state:
-        st.session_state["seed_kits"] = random.randint(700, 1000)
+        st.session_state["uploads"] = PostFeed()
 
     if "last_visit" not in st.session_state:
         st.session_state["last_visit"] = datetime.now()
 
     if "user_plants" not in st.session_state:
-        st.session_state["user_plants"] = [
-            {"name": "Tomato", "progress": random.randint(20, 95), "planted_date": datetime(2025, 1, 15)},
-            {"name": "Basil", "progress": random.randint(20, 95), "planted_date": datetime(2025, 2, 3)}
-        ]
+        # Progress follows from the planting date (see Garden)
+        st.session_state["user_plants"] = Garden()
+        st.session_state["user_plants"].add("Tomato", datetime.now() - timedelta(days=random.randint(20, 60)))
+        st.session_state["user_plants"].add("Basil", datetime.now() - timedelta(days=random.randint(10, 40)))
 
     if "user_plant_history" not in st.session_state:
-         st.session_state["user_plant_history"] = [
-                {"Plant Type": "Lettuce", "Date Planted": "2025-02-28", "Harvest Date": "2025-04-10", "Success": "Yes"},
-                {"Plant Type": "Spinach", "Date Planted": "2025-03-10", "Harvest Date": "Failed", "Success": "No"}
-            ]
+         # Typed and kept sorted by planting date (see PlantHistory); no harvest date = failed
+         st.session_state["user_plant_history"] = PlantHistory()
+         st.session_state["user_plant_history"].add_many(
+                ["Lettuce", "Spinach"],
+                [datetime(2025, 2, 28), datetime(2025, 3, 10)],
+                [datetime(2025, 4, 10), None],
+                [True, False]
+            )
+
+    # Large per-session objects move into spill slots so they count against the memory budgets
+    for key in SPILLABLE_KEYS:
+        if not isinstance(st.session_state[key], SpillSlot):
+            st.session_state[key] = get_spill_manager().slot(session_owner(), key, st.session_state[key])
 
     # Billboard data - Corrected URL
     billboards = {
@@ -107,22 +273,26 @@ def initialize_data():
             # Corrected URL to point to a direct image file
             "url": "digital-screen-with-environment-day.jpg",
             "description": "A campaign promoting home vegetable gardening for urban dwellers.",
-            "sponsor": "OrganicFoods Co."
+            "sponsor": "OrganicFoods Co.",
+            "investment": 15000
         },
         "From Message to Meal": {
             "url": "close-up-hands-taking-food-photos.jpg",
             "description": "An initiative turning advertising space into food production.",
-            "sponsor": "EcoEats"
+            "sponsor": "EcoEats",
+            "investment": 12000
         },
         "Food Waste Awareness": {
             "url": "assortment-compost-made-rotten-food.jpg",
             "description": "Highlighting the importance of reducing food waste in our communities.",
-            "sponsor": "WasteNot Foundation"
+            "sponsor": "WasteNot Foundation",
+            "investment": 8000
         },
         "Urban Farming Revolution": {
             "url": "busy-group-farmers-modern-entrepreneurial-bio-agricultural-greenhouse-used-growing-natural-healthy-eco-vegetables-regenerative-agriculture-using-pesticide-free-soil-fertilizer.jpg", # Using same image for example
             "description": "Transforming city spaces into productive green gardens.",
-            "sponsor": "CityGrow Initiative"
+            "sponsor": "CityGrow Initiative",
+            "investment": 10000
         }
     }
     return billboards
@@ -183,7 +353,7 @@ def display_sidebar():
     st.sidebar.markdown(f"### Profile ({simulated_role.capitalize()})") # Show simulated role instead of username
     st.sidebar.markdown(f"**Badge:** {badge}")
     st.sidebar.progress(activity_score / 100)
-    plants_grown_user = len(st.session_state.get("user_plants", []))
+    plants_grown_user = st.session_state["user_plants"].length # As of the last rerun; avoids reloading spilled data
     st.sidebar.markdown(f"**Plants Currently Growing:** {plants_grown_user}")
     st.sidebar.markdown(f"**Est. CO₂ Offset:** {plants_grown_user * random.randint(2, 5)} kg")
 
@@ -215,6 +385,37 @@ def display_sidebar():
     return page, simulated_role
     
 # ------ HOME PAGE ------
+# Display width (px) of the campaign image in the 2:1 column layout
+BILLBOARD_IMAGE_WIDTH = 960
+
+@st.cache_resource
+def get_billboard_assets(image_paths):
+    """Returns the decoded billboard images, loaded once per process from (campaign, path) pairs."""
+    return BillboardAssets(dict(image_paths))
+
+# Billboard sensors post batched readings to this local endpoint (see farmboard.telemetry); port 0 picks a free one
+TELEMETRY_HOST = os.environ.get("GROW_TELEMETRY_HOST", "127.0.0.1")
+TELEMETRY_PORT = int(os.environ.get("GROW_TELEMETRY_PORT", "8765"))
+# Simulated boards feed the endpoint unless GROW_TELEMETRY_SIMULATE=0 (real boards are sending)
+TELEMETRY_SIMULATE = os.environ.get("GROW_TELEMETRY_SIMULATE", "1") != "0"
+# Current Conditions refresh interval, the window deltas are measured against, and when a board counts as offline
+TELEMETRY_REFRESH_SECONDS = 5
+TELEMETRY_WINDOW_SECONDS = 3600
+TELEMETRY_STALE_SECONDS = 120
+
+# Tank water level (%) at or above which the status is "Optimal" / "Slightly Dry"; below that "Needs Water"
+WATER_LEVEL_OPTIMAL = 60
+WATER_LEVEL_LOW = 30
+
+@st.cache_resource
+def get_telemetry(billboard_names):
+    """Returns the process-wide (TelemetryStore, TelemetryServer), with the endpoint and simulator started."""
+    store = TelemetryStore(billboard_names) # Batches for any other name are refused
+    server = TelemetryServer(store, TELEMETRY_HOST, TELEMETRY_PORT).start()
+    if server.error is None and TELEMETRY_SIMULATE:
+        start_simulator(TELEMETRY_HOST, server.port, billboard_names)
+    return store, server
+
 def display_home(billboards):
     """Displays the main home page with billboard previews and stats."""
     st.markdown("<h1 class='main-title'>🌿 Growvertising – Billboard to Farmboard</h1>", unsafe_allow_html=True)
@@ -222,18 +423,19 @@ def display_home(billboards):
 
     # --- Overall Impact Metrics ---
     st.markdown("<h2 class='sub-title'>🌍 Overall Impact</h2>", unsafe_allow_html=True)
+    impact = get_impact_counters().snapshot() # Shared across all sessions
     col1, col2, col3 = st.columns(3)
     with col1:
         st.markdown("<div class='metric-card'>", unsafe_allow_html=True)
-        st.metric("Total Plants Grown", f"{st.session_state['plants_grown']} 🌱")
+        st.metric("Total Plants Grown", f"{impact['plants_grown']} 🌱")
         st.markdown("</div>", unsafe_allow_html=True)
     with col2:
         st.markdown("<div class='metric-card'>", unsafe_allow_html=True)
-        st.metric("Community CO₂ Offset", f"{st.session_state['co2_offset']} kg")
+        st.metric("Community CO₂ Offset", f"{impact['co2_offset']} kg")
         st.markdown("</div>", unsafe_allow_html=True)
     with col3:
         st.markdown("<div class='metric-card'>", unsafe_allow_html=True)
-        st.metric("Seed Kits Distributed", f"{st.session_state['seed_kits']}")
+        st.metric("Seed Kits Distributed", f"{impact['seed_kits']}")
         st.markdown("</div>", unsafe_allow_html=True)
 
     st.markdown("---") # Separator
@@ -245,11 +447,14 @@ def display_home(billboards):
 
     col_img, col_details = st.columns([2, 1])
     with col_img:
-        # Corrected use_column_width to use_container_width
-        st.image(billboards[selected_ad]["url"], caption=selected_ad, use_container_width=True)
+        # Served from the in-memory variant cache; missing files get a placeholder
+        assets = get_billboard_assets(tuple((name, ad["url"]) for name, ad in billboards.items()))
+        st.image(assets.variant(selected_ad, BILLBOARD_IMAGE_WIDTH), caption=selected_ad, use_container_width=True)
+        if selected_ad in assets.missing:
+            st.caption("Campaign image unavailable, showing a placeholder.")
 
     with col_details:
-        st.markdown(f"### Campaign Details")
+        st.markdown("### Campaign Details")
         st.markdown(f"**Description:** {billboards[selected_ad]['description']}")
         st.markdown(f"**Sponsor:** {billboards[selected_ad]['sponsor']}")
         st.markdown("---")
@@ -257,12 +462,14 @@ def display_home(billboards):
         # Add interaction options
         st.markdown("### Get Involved")
         if st.button("Request Seed Kit", key=f"seed_kit_{selected_ad}"):
-            st.session_state["seed_kits"] += 1
+            get_impact_counters().increment("seed_kits") # Buffered, flushed to disk in batches
+            record_event("seed_kit", selected_ad)
             st.success("Seed kit request submitted! Check your email for details.")
             st.balloons() # Add visual feedback
 
         if st.button("Support This Campaign", key=f"support_{selected_ad}"):
-            # In a real app, this might track support or link to a donation page
+            # In a real app, this might also link to a donation page
+            record_event("support", selected_ad)
             st.balloons()
             st.success("Thank you for your support!")
 
@@ -272,7 +479,7 @@ def display_home(billboards):
     st.markdown("<h2 class='sub-title'>🌱 Simulated Billboard Growth</h2>", unsafe_allow_html=True)
     st.info("This section shows a simulated representation of plant growth on a physical billboard.")
 
-    col_growth, col_days, col_water = st.columns(3)
+    col_growth, col_days = st.columns(2)
     with col_growth:
         growth_percentage = random.randint(60, 90)
         st.progress(growth_percentage / 100)
@@ -283,26 +490,61 @@ def display_home(billboards):
         delta_days = -1 if days_remaining < 30 else 0
         st.metric("Est. Days Until Harvest", f"{days_remaining} days", f"{delta_days} vs yesterday")
 
-    with col_water:
-        water_status = random.choice(["Optimal", "Needs Water", "Slightly Dry"])
-        st.metric("Water Level Status", water_status)
-        if water_status == "Needs Water":
-            st.warning("💧 Water levels are low!")
-        elif water_status == "Optimal":
-            st.success("💧 Water levels are good.")
-
-    # --- Growing Conditions --- (Example static data)
-    st.markdown("<h2 class='sub-title'>🌤️ Current Conditions (Example Location)</h2>", unsafe_allow_html=True)
+    # --- Growing Conditions --- (Live billboard sensors; refreshes on its own)
+    st.markdown("<h2 class='sub-title'>🌤️ Current Conditions</h2>", unsafe_allow_html=True)
+    st.fragment(display_conditions, run_every=TELEMETRY_REFRESH_SECONDS)(tuple(billboards), selected_ad)
+
+def format_reading(value, unit, digits=1, signed=False):
+    """Formats a sensor value (or a signed difference) for st.metric; "—" when the sensor sent nothing."""
+    if np.isnan(value):
+        return "—"
+    value = round(float(value), digits) + 0.0 # No "-0" for differences that round to zero
+    return f"{value:{'+' if signed else ''},.{digits}f}{'' if unit in ('%', '°C') else ' '}{unit}"
+
+def display_conditions(billboard_names, billboard):
+    """Displays the billboard's latest sensor readings, compared with the last hour's average."""
+    store, server = get_telemetry(billboard_names)
+    if server.error is not None:
+        st.warning(f"Sensor endpoint could not start on port {server.port}: {server.error.strerror}")
+    buffer = store.buffer(billboard)
+    # Lock-free reads of the ring buffer; ingestion runs on the endpoint's own thread
+    with get_metrics().timer("home.conditions"):
+        latest = buffer.latest() if buffer is not None else None
+        window = buffer.aggregate(TELEMETRY_WINDOW_SECONDS) if latest else None
+    if latest is None:
+        st.info("No sensor readings received from this billboard yet.")
+        return
+    reading_time, reading = latest
+
+    columns = st.columns(5)
+    metrics = [
+        ("Temperature", "temperature", 1),
+        ("Humidity", "humidity", 0),
+        ("Sunlight", "sunlight", 0),
+        ("Soil Moisture", "soil_moisture", 0),
+        ("Water Level", "water_level", 0)
+    ]
+    for column, (label, sensor, digits) in zip(columns, metrics):
+        value, mean = reading[sensor], window[sensor]["mean"]
+        unit = SENSOR_UNITS[sensor]
+        delta = None if np.isnan(value) or np.isnan(mean) else f"{format_reading(value - mean, unit, digits, signed=True)} vs 1h avg"
+        with column:
+            st.metric(label, format_reading(value, unit, digits), delta)
+
+    water_level = reading["water_level"]
+    if not np.isnan(water_level):
+        if water_level >= WATER_LEVEL_OPTIMAL:
+            st.success("💧 Water Level Status: Optimal")
+        elif water_level >= WATER_LEVEL_LOW:
+            st.info("💧 Water Level Status: Slightly Dry")
+        else:
+            st.warning("💧 Water Level Status: Needs Water. Water levels are low!")
 
-    col_cond1, col_cond2, col_cond3, col_cond4 = st.columns(4)
-    with col_cond1:
-        st.metric("Temperature", "24°C", "+1.5°C")
-    with col_cond2:
-        st.metric("Humidity", "65%", "-3%")
-    with col_cond3:
-        st.metric("Sunlight", "Good", "UV Index: 6")
-    with col_cond4:
-        st.metric("Soil Moisture", "Okay", "-2%")
+    age = max(0, datetime.now().timestamp() - reading_time)
+    if age > TELEMETRY_STALE_SECONDS:
+        st.warning(f"No readings from this billboard for {age / 60:.0f} min; showing the last values received.")
+    else:
+        st.caption(f"Updated {age:.0f} s ago · {window['count']} readings in the last hour")
 
 
 # ------ MY PLANTS PAGE ------
@@ -311,7 +553,14 @@ def display_my_plants():
     st.markdown("<h1 class='sub-title'>🌱 My Plants</h1>", unsafe_allow_html=True)
     st.markdown("Track and manage the plants you are growing.")
 
-    plant_types = ["Tomato", "Basil", "Lettuce", "Spinach", "Mint", "Pepper", "Chives"]
+    plant_types = list(SPECIES) # Species with a growth curve in farmboard.garden
+    display_garden(plant_types)
+
+@session_fragment
+def display_garden(plant_types):
+    """Displays the plant list, plant history and the add-plant form (adding a plant reruns only this)."""
+    garden = session_data("user_plants")
+    user_plant_history = session_data("user_plant_history")
 
     col_manage, col_add = st.columns([2, 1])
 
@@ -320,78 +569,59 @@ def display_my_plants():
 
         with tab_current:
             st.markdown("### Plants Currently Growing")
-            if not st.session_state.get("user_plants"):
+            if not garden:
                 st.info("You haven't added any plants yet. Use the form on the right to start growing!")
             else:
-                # Iterate through user's plants stored in session state
-                # Use reversed order to show newest first, use index for keys
-                for i in range(len(st.session_state["user_plants"]) - 1, -1, -1):
-                    plant_data = st.session_state["user_plants"][i]
-                    # Use a unique container key based on index or plant info if stable
-                    plant_key_base = f"plant_{i}_{plant_data['name']}"
-                    with st.container(): # Use container for better separation
-                        st.markdown(f"#### {plant_data['name']}")
-                        st.progress(plant_data['progress'] / 100)
-
-                        col_a, col_b, col_c = st.columns(3)
-                        with col_a:
-                            st.markdown(f"**Progress:** {plant_data['progress']}%")
-                        with col_b:
-                            # Calculate days_old dynamically
-                            days_old = (datetime.now() - plant_data['planted_date']).days
-                            st.markdown(f"**Days old:** {days_old}")
-                        with col_c:
-                            health = 'Good' if plant_data['progress'] > 60 else 'Needs Attention' if plant_data['progress'] > 30 else 'Struggling'
-                            st.markdown(f"**Health:** {health}")
-
-                        # Add action buttons
-                        col_actions1, col_actions2 = st.columns(2)
-                        with col_actions1:
-                            if st.button("Update Progress", key=f"update_{plant_key_base}"):
-                                st.session_state["user_plants"][i]["progress"] = min(100, plant_data['progress'] + random.randint(5,15))
-                                st.rerun()
-                        with col_actions2:
-                            if st.button("Mark as Harvested/Finished", key=f"finish_{plant_key_base}"):
-                                harvested_plant = st.session_state["user_plants"].pop(i)
-                                st.session_state["user_plant_history"].append({
-                                    "Plant Type": harvested_plant['name'],
-                                    "Date Planted": harvested_plant['planted_date'].strftime('%Y-%m-%d'),
-                                    "Harvest Date": datetime.now().strftime('%Y-%m-%d'),
-                                    "Success": "Yes" if harvested_plant['progress'] > 50 else "No" # Example success criteria
-                                })
-                                st.success(f"{harvested_plant['name']} moved to history.")
-                                st.rerun()
-
-                        st.markdown("---") # Separator between plants
+                # Growth, health and harvest ETA for every plant in one vectorized pass
+                with get_metrics().timer("my_plants.status"):
+                    status_df = garden.status_frame()
+                col_growing, col_ready, col_attention = st.columns(3)
+                with col_growing:
+                    st.metric("Growing", f"{len(status_df):,}")
+                with col_ready:
+                    st.metric("Ready to Harvest", f"{int((status_df['Progress (%)'] >= HARVEST_READY).sum()):,}")
+                with col_attention:
+                    st.metric("Need Attention", f"{int((status_df['Health'] != 'Good').sum()):,}")
+                st.dataframe(
+                    status_df,
+                    use_container_width=True,
+                    hide_index=True,
+                    column_config={"Progress (%)": st.column_config.ProgressColumn(min_value=0, max_value=100, format="%.0f%%")}
+                )
+
+                # Cards (with actions) only for the newest plants; the table above covers the rest
+                for plant_id in garden.newest(st.session_state.get("garden_visible", FEED_PAGE_SIZE)):
+                    display_plant_card(plant_id)
+                display_feed_pager(garden, "garden")
 
         with tab_history:
             st.markdown("### Past Plants")
-            if not st.session_state.get("user_plant_history"):
+            if not user_plant_history:
                  st.info("No plant history yet.")
             else:
-                # Sort history by Date Planted (descending) before displaying
-                history_list = sorted(st.session_state["user_plant_history"], key=lambda x: x['Date Planted'], reverse=True)
-                history_df = pd.DataFrame(history_list)
-                st.dataframe(history_df, use_container_width=True, hide_index=True)
+                # Already sorted (newest planting first); the frame is reused until the next harvest
+                st.dataframe(
+                    user_plant_history.frame(),
+                    use_container_width=True,
+                    hide_index=True,
+                    column_config={"Harvest Date": st.column_config.DateColumn(help="Empty if the plant failed")}
+                )
+                st.markdown("#### Success Rate by Plant")
+                st.dataframe(
+                    user_plant_history.success_rates(),
+                    use_container_width=True,
+                    column_config={"Success Rate (%)": st.column_config.ProgressColumn(min_value=0, max_value=100, format="%.0f%%")}
+                )
 
     with col_add:
         st.markdown("### Add New Plant")
         with st.form("add_plant_form", clear_on_submit=True):
-            new_plant_type = st.selectbox("Plant Type", plant_types, key="new_plant_type")
-            plant_date = st.date_input("Planting Date", datetime.now().date(), key="new_plant_date")
-            notes = st.text_area("Notes (optional)", key="new_plant_notes")
-
-            submitted = st.form_submit_button("Start Growing")
-            if submitted:
-                st.session_state["user_plants"].append({
-                    "name": new_plant_type,
-                    "progress": random.randint(5, 15), # Initial progress
-                    "planted_date": datetime.combine(plant_date, datetime.min.time()),
-                    "notes": notes
-                })
-                st.success(f"Added {new_plant_type} to your garden!")
-                st.balloons()
-                st.rerun() # Rerun to show the new plant immediately
+            st.selectbox("Plant Type", plant_types, key="new_plant_type")
+            st.date_input("Planting Date", datetime.now().date(), key="new_plant_date")
+            st.text_area("Notes (optional)", key="new_plant_notes")
+
+            # The plant is added in the callback, so this garden rerun already lists it
+            st.form_submit_button("Start Growing", on_click=add_plant)
 
         st.markdown("---")
         st.markdown("### Plant Care Tips")
@@ -409,7 +639,199 @@ def display_my_plants():
         st.markdown("- Harvest outer lettuce leaves soon")
         st.markdown("- Consider adding organic fertilizer to basil")
 
+def update_plant_progress(plant_id):
+    """Button callback: gives one plant extra care, adding to its progress."""
+    session_data("user_plants").boost(plant_id, random.randint(5, 15))
+
+def add_plant():
+    """Form callback: adds the submitted plant before the garden fragment reruns."""
+    new_plant_type = st.session_state["new_plant_type"]
+    session_data("user_plants").add(
+        new_plant_type,
+        datetime.combine(st.session_state["new_plant_date"], datetime.min.time()),
+        st.session_state["new_plant_notes"]
+    )
+    st.toast(f"Added {new_plant_type} to your garden!", icon="🌱")
+    st.balloons()
+
+@session_fragment
+def display_plant_card(plant_id):
+    """Displays one plant; "Update Progress" reruns only this card."""
+    garden = session_data("user_plants")
+    if plant_id not in garden: # Harvested since this card was drawn
+        return
+    status = garden.status(ids=[plant_id])
+    name, progress = status["species"][0], status["progress"][0]
+    # Plant ids are never reused, so widget keys stay attached to the same plant
+    plant_key_base = f"plant_{plant_id}"
+    with st.container(): # Use container for better separation
+        st.markdown(f"#### {name}")
+        st.progress(progress / 100)
+
+        col_a, col_b, col_c = st.columns(3)
+        with col_a:
+            st.markdown(f"**Progress:** {progress:.0f}%")
+        with col_b:
+            st.markdown(f"**Days old:** {status['days_old'][0]}")
+        with col_c:
+            st.markdown(f"**Health:** {status['health'][0]}")
+        st.caption(f"Expected harvest: {status['harvest_eta'][0]}" if progress < HARVEST_READY else "Ready to harvest!")
+
+        # Add action buttons
+        col_actions1, col_actions2 = st.columns(2)
+        with col_actions1:
+            # Applied in the callback, before this card's fragment reruns; nothing else changes
+            st.button("Update Progress", key=f"update_{plant_key_base}", on_click=update_plant_progress, args=(plant_id,))
+        with col_actions2:
+            if st.button("Mark as Harvested/Finished", key=f"finish_{plant_key_base}"):
+                harvested_plant = garden.remove(plant_id) # O(1); other plants keep their ids
+                session_data("user_plant_history").add(
+                    harvested_plant['name'],
+                    harvested_plant['planted_date'],
+                    datetime.now(),
+                    harvested_plant['progress'] > 50 # Example success criteria
+                )
+                st.success(f"{harvested_plant['name']} moved to history.")
+                st.rerun() # Full rerun: the list, the history and the sidebar count all change
+
+        st.markdown("---") # Separator between plants
+
 # ------ COMMUNITY PAGE ------
+# Number of posts added to a community feed per "Load more" click
+FEED_PAGE_SIZE = 12
+
+@st.cache_resource
+def get_photo_index():
+    """Returns the process-wide perceptual hash index of Photo Wall photos (for near-duplicate checks)."""
+    return PhotoIndex(os.path.join(DATA_DIR, "photo_hashes.txt"))
+
+@st.cache_resource
+def get_ingest_pipeline():
+    """Returns the process-wide pipeline that recompresses uploads (see IngestPipeline)."""
+    return IngestPipeline(get_media_store(), os.path.join(DATA_DIR, "incoming"), get_image_workers(), photo_index=get_photo_index())
+
+@st.cache_resource
+def get_moderation_queue():
+    """Returns the process-wide moderation queue that new photos and comments are submitted to."""
+    return ModerationQueue()
+
+def feed_window(items, feed_key):
+    """Returns the newest-first window of a PostFeed that is currently visible."""
+    visible = st.session_state.get(f"{feed_key}_visible", FEED_PAGE_SIZE)
+    return items.window(0, visible)
+
+def set_feed_visible(feed_key, visible):
+    """Button callback: sets how many posts of a feed are shown."""
+    st.session_state[f"{feed_key}_visible"] = visible
+
+def like_post(feed_key, post_id):
+    """Button callback: likes a post in the "uploads" or "comments" feed before its card is redrawn."""
+    session_data(feed_key).like(post_id)
+    record_event("like")
+
+def display_feed_pager(items, feed_key):
+    """Displays the "Load more" / "Back to newest" controls below a feed window (call it inside the feed's fragment)."""
+    visible_key = f"{feed_key}_visible"
+    visible = st.session_state.get(visible_key, FEED_PAGE_SIZE)
+    st.caption(f"Showing {min(visible, len(items))} of {len(items)}")
+    col_more, col_reset = st.columns(2)
+    # Callbacks run before the feed's fragment reruns, so the new window is drawn in one pass
+    with col_more:
+        if len(items) > visible:
+            st.button("Load more", key=f"{feed_key}_load_more", on_click=set_feed_visible, args=(feed_key, visible + FEED_PAGE_SIZE))
+    with col_reset:
+        if visible > FEED_PAGE_SIZE:
+            st.button("Back to newest", key=f"{feed_key}_reset", on_click=set_feed_visible, args=(feed_key, FEED_PAGE_SIZE))
+
+def publish_photo(current_user_name, media_digest=None, ingest_token=None):
+    """Posts a photo to the Photo Wall with the form's caption and location, then clears the form.
+
+    The photo is either already stored (`media_digest`) or still being ingested
+    (`ingest_token`, see IngestPipeline); the card shows it once it is stored.
+    """
+    caption = st.session_state.get("photo_caption", "")
+    location = st.session_state.get("photo_location", "")
+    record_event("upload")
+    post_id = session_data("uploads").add({
+        "media": media_digest,
+        "ingest": ingest_token,
+        "caption": caption,
+        "location": location if location else "Unknown Location",
+        "user": current_user_name, # Use the generic name
+        "timestamp": datetime.now(),
+        "likes": 0
+    })
+    # Published right away; moderators review it afterwards (see ModerationQueue)
+    get_moderation_queue().submit("photo", post_id, current_user_name, f"{caption} {location}".strip(), author=session_owner())
+    # Clear inputs after successful upload (the file uploader keeps its file)
+    st.session_state["photo_caption"] = ""
+    st.session_state["photo_location"] = ""
+    st.session_state["upload_notice"] = ("success", "Photo uploaded! It appears on the wall as soon as it is processed. 🌿")
+
+def upload_photo(current_user_name):
+    """Button callback: ingests the chosen photo, unless it is too large or looks like a photo already on the wall."""
+    uploaded_file = st.session_state.get("photo_uploader")
+    if uploaded_file is None:
+        return
+    if not st.session_state.get("photo_caption"):
+        st.session_state["upload_notice"] = ("warning", "Please add a caption for your photo.")
+        return
+    # Checked against the reported size, before any of the body is read
+    max_upload_mb = get_settings().get("max_upload_mb")
+    if uploaded_file.size > max_upload_mb * 1024 * 1024:
+        st.session_state["upload_notice"] = ("error", f"This photo is {uploaded_file.size / (1024 * 1024):.1f} MB; the upload limit is {max_upload_mb} MB.")
+        return
+    ingest = get_ingest_pipeline()
+    path = ingest.spool(uploaded_file) # Streamed to disk; the worker reads it from there
+    try:
+        photo_hash = dhash(path)
+    except Exception:
+        photo_hash = None # Not decodable; ingestion fails and the card says so
+    match = get_photo_index().find(photo_hash) if photo_hash is not None else None
+    if match is not None:
+        # Ask first (see display_community); nothing is ingested until the user decides
+        distance, media_digest = match
+        st.session_state["duplicate_upload"] = {"digest": media_digest, "distance": distance, "hash": photo_hash, "path": path}
+        return
+    publish_photo(current_user_name, ingest_token=ingest.submit(path, photo_hash))
+
+def resolve_duplicate(link, current_user_name):
+    """Button callback: posts the existing photo (link) or ingests the new one anyway."""
+    duplicate = st.session_state.pop("duplicate_upload", None)
+    if duplicate is None:
+        return
+    if link:
+        get_ingest_pipeline().discard(duplicate["path"])
+        publish_photo(current_user_name, media_digest=duplicate["digest"]) # No new bytes, thumbnails or grid images
+    else:
+        publish_photo(current_user_name, ingest_token=get_ingest_pipeline().submit(duplicate["path"], duplicate["hash"]))
+
+def dismiss_duplicate():
+    """Callback: drops a pending duplicate-photo prompt and its spooled upload."""
+    duplicate = st.session_state.pop("duplicate_upload", None)
+    if duplicate is not None:
+        get_ingest_pipeline().discard(duplicate["path"])
+
+def upload_media(upload):
+    """Returns ("done", digest), ("pending", None) or ("failed", None) for a Photo Wall post's photo."""
+    if upload.get("media") is not None:
+        return "done", upload["media"]
+    if upload.get("ingest_failed"):
+        return "failed", None
+    status, media_digest = get_ingest_pipeline().result(upload["ingest"])
+    # The pipeline forgets finished results once collected, so the post keeps the outcome
+    if status == "done":
+        upload["media"] = media_digest
+    elif status == "failed":
+        upload["ingest_failed"] = True
+    return status, media_digest
+
+def poll_ingestion(tokens):
+    """Reruns the page once none of the given uploads is still being processed."""
+    ingest = get_ingest_pipeline()
+    if not any(ingest.is_pending(token) for token in tokens): # Peek only; the cards collect the results
+        st.rerun()
+
 def display_community(current_user_name="Community User"): # Default user name
     """Displays the community interaction page."""
     st.markdown("<h1 class='sub-title'>👨‍👩‍👧‍👦 Community Hub</h1>", unsafe_allow_html=True)
@@ -423,131 +845,224 @@ def display_community(current_user_name="Community User"): # Default user name
         uploaded_file = st.file_uploader(
             "Upload a photo of your plants!",
             type=["jpg", "png", "jpeg"],
-            key="photo_uploader"
+            key="photo_uploader",
+            max_upload_size=get_settings().get("max_upload_mb"), # Larger files are refused before they are sent
+            on_change=dismiss_duplicate # A pending duplicate prompt was about the previous file
         )
-        caption = st.text_input("Caption for your photo", key="photo_caption")
-        location = st.text_input("Location (optional, e.g., 'City, State')", key="photo_location")
-
-        if st.button("Upload Photo", key="upload_photo_btn") and uploaded_file is not None:
-            if caption:
-                image_bytes = uploaded_file.getvalue()
-                st.session_state["uploads"].append({
-                    "image_bytes": image_bytes,
-                    "caption": caption,
-                    "location": location if location else "Unknown Location",
-                    "user": current_user_name, # Use the generic name
-                    "timestamp": datetime.now(),
-                    "likes": 0
-                })
-                st.success("Photo uploaded successfully! 🌿")
-                # Clear inputs after successful upload
-                st.session_state.photo_caption = ""
-                st.session_state.photo_location = ""
-                # Don't clear file uploader state here, let Streamlit handle it on rerun
-                st.rerun()
-            else:
-                st.warning("Please add a caption for your photo.")
-        elif st.button("Upload Photo", key="upload_photo_btn_clicked_no_file", disabled=(uploaded_file is None)):
-             # This button logic might be redundant if the main button handles the None case
-             # Keep it simple: only one button, check condition inside
-             pass # Main button handles the None case implicitly
-
+        st.text_input("Caption for your photo", key="photo_caption")
+        st.text_input("Location (optional, e.g., 'City, State')", key="photo_location")
+
+        st.button("Upload Photo", key="upload_photo_btn", disabled=uploaded_file is None, on_click=upload_photo, args=(current_user_name,))
+        notice = st.session_state.pop("upload_notice", None)
+        if notice:
+            level, message = notice
+            getattr(st, level)(message)
+
+        duplicate = st.session_state.get("duplicate_upload")
+        if duplicate:
+            # Set by upload_photo: the photo is perceptually the same as one already stored
+            st.warning(f"This photo looks like one already on the Photo Wall ({duplicate['distance']} of 64 hash bits differ). Link to it instead of uploading a copy?")
+            thumb = get_thumbnail_pipeline().thumbnail(duplicate["digest"], PHOTO_GRID_THUMB_WIDTH)
+            if thumb is not None:
+                st.image(thumb, caption="Photo already on the wall", width=320)
+            col_link, col_upload, col_cancel = st.columns(3)
+            with col_link:
+                st.button("🔗 Link to existing photo", key="duplicate_link", on_click=resolve_duplicate, args=(True, current_user_name))
+            with col_upload:
+                st.button("Upload mine anyway", key="duplicate_upload_anyway", on_click=resolve_duplicate, args=(False, current_user_name))
+            with col_cancel:
+                st.button("Cancel", key="duplicate_cancel", on_click=dismiss_duplicate)
 
         st.markdown("---")
         st.markdown("### Recent Community Photos")
+        display_photo_wall()
 
-        if not st.session_state.get("uploads"):
-            st.info("No photos shared yet. Be the first!")
+    with tab_comments:
+        display_discussion(current_user_name)
+
+# Photo cards, comment cards and both feeds are fragments: a like or "Load more" click
+# reruns only the fragment it belongs to, not the sidebar, the other tab or the other cards.
+@session_fragment
+def display_photo_wall():
+    """Displays the newest community photos in a 3-column grid with paging."""
+    uploads = session_data("uploads")
+    if not uploads:
+        st.info("No photos shared yet. Be the first!")
+        return
+    with get_metrics().timer("community.photo_grid"):
+        cols = st.columns(3) # Display in 3 columns
+
+        # Only build widgets for the visible window (newest first)
+        window = feed_window(uploads, "photo_feed")
+        for i, upload in enumerate(window):
+            with cols[i % 3]:
+                display_photo_card(upload["id"])
+
+        # Poll while visible uploads are still being processed; the page reruns once they are done
+        processing = [upload["ingest"] for upload in window if upload.get("media") is None and upload.get("ingest") and not upload.get("ingest_failed")]
+        if processing:
+            st.fragment(poll_ingestion, run_every=1)(processing)
+
+        display_feed_pager(uploads, "photo_feed")
+
+@session_fragment
+def display_photo_card(post_id):
+    """Displays one Photo Wall card; liking it reruns only this card."""
+    if get_moderation_queue().is_rejected(post_id):
+        st.caption("🚫 This photo was removed by a moderator.")
+        return
+    uploads = session_data("uploads")
+    upload = uploads.get(post_id)
+    status, media_digest = upload_media(upload)
+    # Use a container for each photo card for better spacing/styling
+    with st.container():
+        if status == "pending":
+            st.caption(f"⏳ Processing photo... {upload['caption']} ({upload['user']})")
+        elif status == "failed":
+            st.error("Could not process this photo.")
         else:
-            num_photos = len(st.session_state["uploads"])
-            cols = st.columns(3) # Display in 3 columns
-
-            # Iterate reversed to show newest first
-            for i, upload in enumerate(reversed(st.session_state["uploads"])):
-                col_index = i % 3
-                with cols[col_index]:
-                    # Use a container for each photo card for better spacing/styling
-                    with st.container():
-                        try:
-                            # Corrected use_column_width to use_container_width
-                            st.image(upload["image_bytes"], caption=f"{upload['caption']} ({upload['user']})", use_container_width=True)
-                        except Exception as e:
-                             st.error(f"Could not display image.") # Simplified error
-
-                        # Like button logic
-                        like_key = f"like_photo_{upload['timestamp'].isoformat()}"
-                        likes = upload.get("likes", 0)
-
-                        # Use a unique key to prevent conflicts
-                        if st.button(f"❤️ {likes} Like", key=like_key):
-                            # Find the specific upload in the original list to update
-                            for original_upload in st.session_state["uploads"]:
-                                if original_upload["timestamp"] == upload["timestamp"]:
-                                     original_upload["likes"] = original_upload.get("likes", 0) + 1
-                                     break # Stop searching once found
-                            st.rerun() # Rerun to update the like count display
-
-                        st.caption(f"📍 {upload['location']} | ⏰ {upload['timestamp'].strftime('%Y-%m-%d %H:%M')}")
+            # Render the small WebP thumbnail; the original is only read on demand
+            thumbnails = get_thumbnail_pipeline()
+            thumb = thumbnails.thumbnail(media_digest, PHOTO_GRID_THUMB_WIDTH)
+            if thumb is not None:
+                st.image(thumb, caption=f"{upload['caption']} ({upload['user']})", use_container_width=True)
+            elif thumbnails.is_pending(media_digest):
+                st.caption(f"⏳ Preparing preview... {upload['caption']} ({upload['user']})")
+            else:
+                st.error("Could not display image.") # Simplified error
+
+            if st.toggle("Show original", key=f"original_photo_{post_id}"):
+                try:
+                    st.image(get_media_store().read(media_digest), use_container_width=True)
+                except Exception as e:
+                    st.error("Could not display image.")
+
+        # Like button logic
+        like_key = f"like_photo_{post_id}"
+        likes = upload.get("likes", 0)
+
+        # Post ids are unique, so the key never collides and the lookup is O(1).
+        # The like is applied in the callback, before this card's fragment reruns.
+        st.button(f"❤️ {likes} Like", key=like_key, on_click=like_post, args=("uploads", post_id))
+
+        st.caption(f"📍 {upload['location']} | ⏰ {upload['timestamp'].strftime('%Y-%m-%d %H:%M')}")
+
+@session_fragment
+def display_discussion(current_user_name):
+    """Displays the Discussion Forum: the comment form and the newest comments."""
+    comments = session_data("comments")
+    st.markdown("### 💬 Community Discussion")
+
+    with st.form("comment_form", clear_on_submit=True):
+        comment_text = st.text_area("Leave a message, tip, or question for the community!", max_chars=300, height=100, key="comment_text_area")
+        submitted = st.form_submit_button("Post Comment")
+
+        if submitted and comment_text:
+            post_id = comments.add({
+                "user": current_user_name, # Use the generic name
+                "comment": comment_text,
+                "timestamp": datetime.now(),
+                "likes": 0
+            })
+            get_moderation_queue().submit("comment", post_id, current_user_name, comment_text, author=session_owner())
+            st.success("Comment posted! 💬")
+            # The list below is drawn after this, in the same fragment run
+        elif submitted and not comment_text:
+            st.warning("Please enter a comment before posting.")
 
+    st.markdown("---")
+    st.markdown("### Recent Comments:")
+
+    # Initialize sample comments only once
+    if not comments and not st.session_state.get("comments_initialized", False):
+        sample_comments = [
+            {"user": "GreenThumb", "comment": "Just harvested my first batch of tomatoes! Can't believe how well they turned out.", "timestamp": datetime(2025, 4, 25, 14, 32), "likes": 12},
+            {"user": "PlantLover", "comment": "Has anyone had issues with yellowing leaves on their basil plants? Looking for advice!", "timestamp": datetime(2025, 4, 26, 9, 15), "likes": 8},
+            {"user": "UrbanFarmer", "comment": "The community garden project is coming along nicely! Check out our progress photos.", "timestamp": datetime(2025, 4, 27, 16, 45), "likes": 15}
+        ]
+        for sample_comment in sample_comments:
+            comments.add(sample_comment)
+        st.session_state["comments_initialized"] = True # Mark as initialized
+
+    search_query = st.text_input("🔎 Search discussions", key="comment_search", placeholder="e.g. yellowing basil leaves")
+
+    if not comments:
+         st.info("No comments yet. Start the conversation!")
+    elif search_query.strip():
+         # Ranked lookup in the comments' inverted index; only matching postings are scored
+         with get_metrics().timer("community.comment_search"):
+             results, matches = comments.search(search_query, limit=FEED_PAGE_SIZE)
+         if not results:
+             st.info(f"No comments match \"{search_query}\".")
+         else:
+             st.caption(f"Top {len(results)} of {matches:,} matching comments")
+             for entry in results:
+                 display_comment_card(entry["id"])
+    else:
+         with get_metrics().timer("community.comments"):
+             # Only build widgets for the visible window (newest first)
+             for entry in feed_window(comments, "comment_feed"):
+                 display_comment_card(entry["id"])
+
+             display_feed_pager(comments, "comment_feed")
+
+@session_fragment
+def display_comment_card(post_id):
+    """Displays one comment; liking it reruns only this comment."""
+    if get_moderation_queue().is_rejected(post_id):
+        st.caption("🚫 This comment was removed by a moderator.")
+        st.markdown("---")
+        return
+    comments = session_data("comments")
+    entry = comments.get(post_id)
+    # Use container for better spacing/styling
+    with st.container():
+        st.markdown(f"**{entry['user']}** ({entry['timestamp'].strftime('%Y-%m-%d %H:%M')})")
+        st.markdown(f"> {entry['comment']}")
 
-    with tab_comments:
-        st.markdown("### 💬 Community Discussion")
-
-        with st.form("comment_form", clear_on_submit=True):
-            comment_text = st.text_area("Leave a message, tip, or question for the community!", max_chars=300, height=100, key="comment_text_area")
-            submitted = st.form_submit_button("Post Comment")
-
-            if submitted and comment_text:
-                st.session_state["comments"].append({
-                    "user": current_user_name, # Use the generic name
-                    "comment": comment_text,
-                    "timestamp": datetime.now(),
-                    "likes": 0
-                })
-                st.success("Comment posted! 💬")
-                # Rerun is implicitly handled by clear_on_submit=True
-            elif submitted and not comment_text:
-                st.warning("Please enter a comment before posting.")
+        # Like button logic
+        like_key = f"like_comment_{post_id}"
+        likes = entry.get("likes", 0)
 
-        st.markdown("---")
-        st.markdown("### Recent Comments:")
-
-        # Initialize sample comments only once
-        if not st.session_state.get("comments") and not st.session_state.get("comments_initialized", False):
-            sample_comments = [
-                {"user": "GreenThumb", "comment": "Just harvested my first batch of tomatoes! Can't believe how well they turned out.", "timestamp": datetime(2025, 4, 25, 14, 32), "likes": 12},
-                {"user": "PlantLover", "comment": "Has anyone had issues with yellowing leaves on their basil plants? Looking for advice!", "timestamp": datetime(2025, 4, 26, 9, 15), "likes": 8},
-                {"user": "UrbanFarmer", "comment": "The community garden project is coming along nicely! Check out our progress photos.", "timestamp": datetime(2025, 4, 27, 16, 45), "likes": 15}
-            ]
-            st.session_state["comments"] = sample_comments
-            st.session_state["comments_initialized"] = True # Mark as initialized
+        st.button(f"❤️ {likes}", key=like_key, help="Like this comment", on_click=like_post, args=("comments", post_id))
 
-        if not st.session_state.get("comments"):
-             st.info("No comments yet. Start the conversation!")
-        else:
-             # Iterate reversed to show newest first
-             for i, entry in enumerate(reversed(st.session_state["comments"])):
-                 # Use container for better spacing/styling
-                 with st.container():
-                     st.markdown(f"**{entry['user']}** ({entry['timestamp'].strftime('%Y-%m-%d %H:%M')})")
-                     st.markdown(f"> {entry['comment']}")
-
-                     # Like button logic
-                     like_key = f"like_comment_{entry['timestamp'].isoformat()}"
-                     likes = entry.get("likes", 0)
-
-                     if st.button(f"❤️ {likes}", key=like_key, help="Like this comment"):
-                          # Find the specific comment in the original list to update
-                          for original_comment in st.session_state["comments"]:
-                              if original_comment["timestamp"] == entry["timestamp"]:
-                                   original_comment["likes"] = original_comment.get("likes", 0) + 1
-                                   break # Stop searching
-                          st.rerun() # Rerun to update like count
-
-                     st.markdown("---")
+        st.markdown("---")
 
 # ------ SPONSOR DASHBOARD ------
-def display_sponsor_dashboard():
+@st.cache_data(ttl=60, show_spinner=False)
+def load_campaign_series(campaign_names, day):
+    """Builds the daily engagement and cumulative growth series for a campaign set.
+
+    Rolled up from the engagement event log. Cached across sessions per (campaign set,
+    day) for a minute, so reruns from unrelated widgets are cache hits. Invalidate with
+    load_campaign_series.clear().
+    """
+    dates = pd.date_range(end=pd.Timestamp(day), periods=30, freq='D')
+    log = get_event_log()
+
+    # This is the DataFrame for campaign trends: all interactions per campaign and day
+    engagement_data = pd.DataFrame(
+        log.daily_counts(campaign_names, day, days=30),
+        index=dates,
+        columns=list(campaign_names)
+    )
+
+    growth_data = pd.DataFrame(
+        log.daily_counts(campaign_names, day, days=30, kinds=GROWTH_KINDS), # Seed kits and uploads per day
+        index=dates,
+        columns=list(campaign_names)
+    ).cumsum() # Cumulative growth
+    return engagement_data, growth_data
+
+@st.cache_resource
+def get_report_cache():
+    """Returns the cache of rendered reports shared by all sessions."""
+    return ReportCache()
+
+# Litres of water saved per plant grown, for the Environmental Impact report (middle of a 5-15 L estimate)
+WATER_SAVED_LITERS_PER_PLANT = 10
+
+def display_sponsor_dashboard(billboards):
     """Displays the dashboard for sponsors."""
     st.markdown("<h1 class='sub-title'>📊 Sponsor Dashboard</h1>", unsafe_allow_html=True)
     st.markdown("Monitor the impact and performance of sponsored campaigns.")
@@ -556,9 +1071,10 @@ def display_sponsor_dashboard():
     st.markdown("### Key Performance Metrics (Overall)")
 
     col1, col2, col3 = st.columns(3)
-    plants_grown = st.session_state.get('plants_grown', 0)
-    co2_offset = st.session_state.get('co2_offset', 0)
-    seed_kits = st.session_state.get('seed_kits', 0)
+    impact = get_impact_counters().snapshot()
+    plants_grown = impact['plants_grown']
+    co2_offset = impact['co2_offset']
+    seed_kits = impact['seed_kits']
 
     with col1:
         st.markdown("<div class='metric-card'>", unsafe_allow_html=True)
@@ -578,49 +1094,40 @@ def display_sponsor_dashboard():
     # Campaign performance - Use more realistic data generation
     st.markdown("### Campaign Performance Analysis")
 
-    campaign_names = ['Grow Your Greens', 'From Message to Meal', 'Food Waste Awareness', 'Urban Farming']
-    dates = pd.date_range(end=datetime.now(), periods=30, freq='D')
-
-    # This is the DataFrame for campaign trends
-    engagement_data = pd.DataFrame(
-        np.random.randint(10, 100, size=(30, len(campaign_names))),
-        index=dates,
-        columns=campaign_names
-    ) * [1.5, 1.2, 0.8, 1.0] # Simulate different campaign effectiveness
-
-    growth_data = pd.DataFrame(
-        np.random.rand(30, len(campaign_names)) * 5, # Simulate daily growth contribution
-        index=dates,
-        columns=campaign_names
-    ).cumsum() # Cumulative growth
-
+    campaign_names = list(billboards.keys())
+    with get_metrics().timer("dashboard.data"):
+        engagement_data, growth_data = load_campaign_series(tuple(campaign_names), datetime.now().date())
 
     tab_engage, tab_growth, tab_roi = st.tabs(["📈 Engagement Trends", "🌱 Growth Rate", "💰 ROI Metrics (Example)"])
 
+    # The example history is only in memory; say so wherever it is part of a chart
+    example_note = " Includes example history." if get_event_log().example_count else ""
     with tab_engage:
         st.line_chart(engagement_data) # Uses the DataFrame defined above
-        st.caption("Simulated daily engagement (e.g., interactions, kit requests) across campaigns (last 30 days)")
+        st.caption(f"Daily engagement (interactions, kit requests, uploads) per campaign from the event log (last 30 days).{example_note}")
 
     with tab_growth:
         st.area_chart(growth_data)
-        st.caption("Simulated cumulative growth contribution per campaign (last 30 days)")
+        st.caption(f"Cumulative growth contribution (seed kits, uploads) per campaign from the event log (last 30 days).{example_note}")
 
     with tab_roi:
         st.markdown("#### Return on Investment (Illustrative)")
-        investment = {"Grow Your Greens": 15000, "From Message to Meal": 12000, "Food Waste Awareness": 8000, "Urban Farming": 10000}
-        # Uses the engagement_data DataFrame and growth_data DataFrame correctly
-        value_generated = (engagement_data.sum() * 0.5 + growth_data.iloc[-1] * 10).round(0) # Example value calc
-
-        roi_data = []
-        for campaign in campaign_names:
-             cost = investment.get(campaign, 1) # Default cost to 1 to avoid division by zero
-             value = value_generated.get(campaign, 0)
-             roi_percent = ((value - cost) / cost) * 100 if cost > 0 else 0
-             roi_data.append({"Campaign": campaign, "Investment ($)": f"${cost:,.0f}", "Estimated Value ($)": f"${value:,.0f}", "ROI (%)": f"{roi_percent:.1f}%"})
-
-        roi_df = pd.DataFrame(roi_data)
-        st.dataframe(roi_df.set_index("Campaign"), use_container_width=True)
-        st.caption("Note: Value and ROI calculations are illustrative examples.")
+        roi_engine = get_roi_engine()
+        # Only a changed investment touches the engine's arrays; otherwise this is one dict comparison
+        roi_engine.set_investments({name: ad.get("investment", 0) for name, ad in billboards.items()})
+        # Numeric frame (all campaigns in one vectorized pass); formatting happens in the table config
+        with get_metrics().timer("dashboard.roi"):
+            roi_df = roi_engine.compute(campaign_names)
+        st.dataframe(
+            roi_df,
+            use_container_width=True,
+            column_config={
+                "Investment ($)": st.column_config.NumberColumn(format="$%,.0f"),
+                "Estimated Value ($)": st.column_config.NumberColumn(format="$%,.0f"),
+                "ROI (%)": st.column_config.NumberColumn(format="%.1f%%")
+            }
+        )
+        st.caption("Note: Value and ROI calculations are illustrative examples (all-time engagement at $0.50 per interaction, $10 per plant).")
 
     st.markdown("---")
 
@@ -642,7 +1149,7 @@ def display_sponsor_dashboard():
             campaign_budget = st.number_input("Budget ($)", min_value=1000, max_value=100000, value=10000, step=500, key="sponsor_camp_budget")
             start_date = st.date_input("Start Date", value=datetime.now().date(), key="sponsor_camp_start") # Default start date
             end_date = st.date_input("End Date", value=datetime.now().date() + pd.Timedelta(days=30), key="sponsor_camp_end") # Default end date
-            uploaded_image = st.file_uploader("Upload Billboard Image", type=['png', 'jpg', 'jpeg'], key="sponsor_camp_img")
+            uploaded_image = st.file_uploader("Upload Billboard Image", type=["png", "jpg", "jpeg"], key="sponsor_camp_img", max_upload_size=get_settings().get("max_upload_mb"))
 
         if st.button("Submit Campaign Proposal", key="sponsor_camp_submit"):
              if campaign_name and campaign_desc and campaign_budget and start_date and end_date and start_date <= end_date:
@@ -675,15 +1182,17 @@ def display_sponsor_dashboard():
     with col_engage:
         st.markdown("#### Top Engaging Content (Sample)")
         # --- FIX: Use a different variable name for this dictionary ---
+        uploads = session_data("uploads")
+        comments = session_data("comments")
         community_engagement_dict = {
             "Content Type": ["Photo Uploads", "Comments", "Likes (Photos)", "Likes (Comments)", "Seed Kit Claims"],
             "Count (Last 30d)": [
-                len(st.session_state.get('uploads', [])), # Total uploads for simplicity
-                len(st.session_state.get('comments', [])), # Total comments for simplicity
-                sum(u.get('likes', 0) for u in st.session_state.get('uploads', [])), # Total photo likes
-                sum(c.get('likes', 0) for c in st.session_state.get('comments', [])), # Total comment likes
+                len(uploads), # Total uploads for simplicity
+                len(comments), # Total comments for simplicity
+                sum(u.get('likes', 0) for u in uploads), # Total photo likes
+                sum(c.get('likes', 0) for c in comments), # Total comment likes
                 # Simple estimation for recent kits
-                max(0, st.session_state.get('seed_kits', 0) - (st.session_state.get('seed_kits', 0) // 1.1 if st.session_state.get('seed_kits', 0) > 100 else random.randint(50,100)))
+                max(0, seed_kits - (seed_kits // 1.1 if seed_kits > 100 else random.randint(50,100)))
             ]
         }
         # --- FIX: Create engage_df from the new dictionary name ---
@@ -697,74 +1206,249 @@ def display_sponsor_dashboard():
     st.markdown("### Download Reports")
     report_type = st.selectbox(
         "Select Report Type",
-        ["Campaign Performance Summary", "User Engagement Analysis", "Environmental Impact Estimate", "Financial Overview"],
+        ["Campaign Performance Summary", "User Engagement Analysis", "Environmental Impact Estimate", "Financial Overview", "Engagement Event Log"],
         key="report_type_select"
         )
     col_format, col_generate = st.columns([1, 2])
     with col_format:
         report_format = st.radio("Report Format", ["CSV", "PDF"], key="report_format_radio")
+        if report_type == "Campaign Performance Summary":
+            report_days = st.radio("Period", [30, 90, 365], format_func=lambda d: f"Last {d} days", key="report_period_radio")
     with col_generate:
         # Generate filename within the column to ensure it uses current selections
         report_filename = f"{report_type.lower().replace(' ', '_')}_report_{datetime.now().strftime('%Y%m%d')}.{report_format.lower()}"
 
-        # Generate report data based on selection
-        report_data = b"" # Initialize report data
-        mime_type = ""
-
+        # Describe how to version and render the selected report; nothing is serialized here
+        report_version = None # Zero-argument callable returning the data version
+        report_render = None # Zero-argument callable returning the rendered report
+        log = get_event_log()
         if report_type == "Campaign Performance Summary":
-            # Now correctly uses the engagement_data DataFrame
-            report_data_df = engagement_data.reset_index().rename(columns={'index': 'Date'})
-            report_data_csv = report_data_df.to_csv(index=False).encode('utf-8')
-            report_data_pdf = b"Sample PDF data for Campaign Performance" # Placeholder PDF
-            report_data = report_data_csv if report_format == "CSV" else report_data_pdf
-            mime_type = "text/csv" if report_format == "CSV" else "application/pdf"
-        elif report_type == "User Engagement Analysis":
-             # Correctly uses engage_df (derived from community_engagement_dict)
-             report_data_df = engage_df
-             report_data_csv = report_data_df.to_csv(index=False).encode('utf-8')
-             report_data_pdf = b"Sample PDF data for User Engagement" # Placeholder PDF
-             report_data = report_data_csv if report_format == "CSV" else report_data_pdf
-             mime_type = "text/csv" if report_format == "CSV" else "application/pdf"
-        elif report_type == "Financial Overview":
-             # Use roi_df defined in the ROI tab
-             report_data_df = roi_df # Note: roi_df might not be defined if tab wasn't rendered; handle this
-             if 'roi_df' in locals():
-                 report_data_csv = report_data_df.to_csv(index=True).encode('utf-8') # Index=True as campaign is index
-                 report_data_pdf = b"Sample PDF data for Financial Overview" # Placeholder PDF
-                 report_data = report_data_csv if report_format == "CSV" else report_data_pdf
-                 mime_type = "text/csv" if report_format == "CSV" else "application/pdf"
-             else:
-                 st.warning("ROI data not available. Please view the ROI tab first.") # Inform user
-                 report_data = b""
-                 mime_type = "text/plain"
-
-        elif report_type == "Environmental Impact Estimate": # Corrected 'else' to 'elif'
-            # Create a simple placeholder DataFrame for environmental impact
-            env_impact_data = {
-                "Metric": ["Total Plants Grown", "Estimated CO₂ Offset (kg)", "Water Saved (Est. Liters)"],
-                "Value": [plants_grown, co2_offset, plants_grown * random.randint(5, 15)]
-            }
-            report_data_df = pd.DataFrame(env_impact_data)
-            report_data_csv = report_data_df.to_csv(index=False).encode('utf-8')
-            report_data_pdf = b"Sample PDF data for Environmental Impact" # Placeholder PDF
-            report_data = report_data_csv if report_format == "CSV" else report_data_pdf
-            mime_type = "text/csv" if report_format == "CSV" else "application/pdf"
-
-        # Use a more robust way to handle download button state within columns/reruns
-        # Place the download button outside the spinner if possible, or manage state carefully
-        # For simplicity here, we keep it direct:
-        if report_data: # Only show button if data was generated
+            # Daily engagement per campaign over the chosen period, rolled up from the event log
+            today = datetime.now().date()
+            def campaign_performance_frame(days=report_days, today=today):
+                daily = log.daily_counts(campaign_names, today, days=days)
+                dates = pd.date_range(end=pd.Timestamp(today), periods=days, freq='D')
+                return pd.DataFrame(daily, index=dates, columns=campaign_names).rename_axis('Date').reset_index()
+            report_version = lambda days=report_days, today=today: (days, today, log.version)
+            report_render = lambda: render_report(report_type, report_format, campaign_performance_frame(), chart="line")
+        elif report_type == "Engagement Event Log":
+            # Raw events, formatted chunk by chunk into one CSV (held in memory for the download); the PDF only shows the first pages
+            report_version = lambda: log.version
+            if report_format == "CSV":
+                report_render = lambda: write_csv_chunks(log.iter_frames())
+            else:
+                report_render = lambda: render_pdf(report_type, next(log.iter_frames(chunk_rows=1000), pd.DataFrame()))
+        else:
+            report_data_df = None
+            report_index = False
+            report_chart = "bar"
+            if report_type == "User Engagement Analysis":
+                 # Correctly uses engage_df (derived from community_engagement_dict)
+                 report_data_df = engage_df
+            elif report_type == "Financial Overview":
+                 # Use roi_df defined in the ROI tab
+                 if 'roi_df' in locals():
+                     report_data_df = roi_df
+                     report_index = True # Campaign is the index
+                 else:
+                     st.warning("ROI data not available. Please view the ROI tab first.") # Inform user
+
+            elif report_type == "Environmental Impact Estimate": # Corrected 'else' to 'elif'
+                # Create a simple placeholder DataFrame for environmental impact
+                env_impact_data = {
+                    "Metric": ["Total Plants Grown", "Estimated CO₂ Offset (kg)", "Water Saved (Est. Liters)"],
+                    "Value": [plants_grown, co2_offset, plants_grown * WATER_SAVED_LITERS_PER_PLANT] # Same counters, same frame and cache entry
+                }
+                report_data_df = pd.DataFrame(env_impact_data)
+
+            if report_data_df is not None:
+                report_version = lambda df=report_data_df: frame_version(df)
+                report_render = lambda df=report_data_df, index=report_index, chart=report_chart: render_report(report_type, report_format, df, index, chart)
+
+        if report_render is not None:
+            def build_report(version=report_version, render=report_render, report_type=report_type, report_format=report_format, cache=get_report_cache(), metrics=get_metrics()):
+                # Runs only when the button is clicked, on Streamlit's download thread;
+                # repeated downloads of unchanged data are served from the shared cache
+                def timed_render():
+                    with metrics.timer(f"report.{report_format.lower()}"): # Serialization only, not cache hits
+                        return render()
+                return cache.get_or_render((report_type, report_format, version()), timed_render)
+
             st.download_button(
                  label=f"Download {report_type} ({report_format})",
-                 data=report_data,
+                 data=build_report,
                  file_name=report_filename,
-                 mime=mime_type,
+                 mime=REPORT_MIME_TYPES[report_format],
                  key=f"download_{report_filename}" # Unique key per report/format
             )
         # The button click triggers immediate download, no need for spinner/success message after
 
 
 # ------ ADMIN PANEL ------
+@st.cache_resource
+def get_job_scheduler():
+    """Returns the process-wide scheduler for maintenance jobs (jobs survive navigation)."""
+    return JobScheduler()
+
+def display_maintenance_jobs():
+    """Displays recent maintenance jobs with progress, results and cancel buttons."""
+    scheduler = get_job_scheduler()
+    jobs = scheduler.jobs()[:10]
+    if not jobs:
+        st.caption("No maintenance jobs have run yet.")
+        return
+    st.markdown("##### Recent Jobs")
+    for job in jobs:
+        with st.container():
+            col_info, col_action = st.columns([4, 1])
+            with col_info:
+                st.markdown(f"**{job.name}** · {job.status} · submitted {job.submitted_at.strftime('%H:%M:%S')}")
+                if not job.done:
+                    st.progress(job.progress, text=job.message or "Waiting for a worker...")
+                elif job.status == "failed":
+                    st.error(job.error)
+                elif job.result is not None:
+                    st.caption(", ".join(f"{key}: {value}" for key, value in job.result.items()))
+            with col_action:
+                if not job.done and st.button("Cancel", key=f"cancel_job_{job.id}", disabled=job.cancel_requested):
+                    scheduler.cancel(job.id)
+                    st.rerun(scope="fragment")
+    if st.session_state.get("maintenance_jobs_active") and not scheduler.has_active_jobs():
+        # Last job just finished: rerun the page once so polling stops
+        st.session_state["maintenance_jobs_active"] = False
+        st.rerun()
+    st.session_state["maintenance_jobs_active"] = scheduler.has_active_jobs()
+
+# Session state keys broken out in the per-session footprint table (everything else is "Other")
+SESSION_STATE_KEYS = ["uploads", "comments", "user_plants", "user_plant_history"]
+
+def list_session_states():
+    """Returns (session id, state dict) for every live session, or just this one if sessions can't be listed."""
+    try:
+        sessions = runtime.get_instance()._session_mgr.list_active_sessions()
+    except (AttributeError, RuntimeError): # No session manager (bare `python grow.py` or AppTest)
+        return [("current", st.session_state.to_dict())]
+    states = []
+    for info in sessions:
+        try:
+            states.append((info.session.id, info.session.session_state.filtered_state))
+        except (KeyError, RuntimeError): # State changed while being read; it is picked up next sample
+            continue
+    return states
+
+@st.cache_data(ttl=10, show_spinner=False)
+def sample_system_stats():
+    """Measures live sessions, their session_state footprint, process RSS and media bytes on disk.
+
+    Spill slots already track their size, so only the other keys are estimated. Samples
+    are shared by all admins and reused for 10 seconds.
+    """
+    rows = []
+    for session_id, state in list_session_states():
+        # Spilled objects are on disk, not in memory (see the spill totals below the table)
+        tracked = {key: 0 if value.spilled else value.size for key, value in list(state.items()) if isinstance(value, SpillSlot)}
+        sizes = state_sizes(state, tracked)
+        row = {"Session": session_id[:8]}
+        for key in SESSION_STATE_KEYS:
+            row[key] = sizes.pop(key, 0) / 1e6
+        row["Other"] = sum(sizes.values()) / 1e6
+        row["Total (MB)"] = sum(row[key] for key in SESSION_STATE_KEYS) + row["Other"]
+        rows.append(row)
+    footprint = pd.DataFrame(rows, columns=["Session", "Total (MB)", *SESSION_STATE_KEYS, "Other"])
+    return {
+        "sessions": len(rows),
+        "footprint": footprint.sort_values("Total (MB)", ascending=False),
+        "rss_bytes": process_rss_bytes(),
+        "media_bytes": get_media_store().disk_usage(),
+        "spill": get_spill_manager().stats(),
+        "sampled_at": datetime.now()
+    }
+
+# Items per moderation batch, and the spam scores (%) the one-click bulk actions apply to
+MODERATION_BATCH_SIZES = [50, 200, 1000]
+LIKELY_SPAM_SCORE = 80
+LIKELY_OK_SCORE = 20
+
+def reset_moderation_batch():
+    """Callback: drops the batch on screen so the next run shows the current top of the queue."""
+    st.session_state.pop("moderation_batch", None)
+
+def moderate(item_numbers, approve):
+    """Button callback: approves or rejects queue items in bulk, then moves on to the next batch."""
+    changed = get_moderation_queue().decide(item_numbers, approve)
+    st.session_state["moderation_notice"] = f"{'Approved' if approve else 'Rejected'} {changed:,} item(s)."
+    reset_moderation_batch()
+
+def display_moderation_queue():
+    """Displays the moderation queue, highest spam score first, with bulk approve/reject."""
+    queue = get_moderation_queue()
+    st.markdown("### Content Moderation")
+    counts = queue.counts()
+    col_pending, col_approved, col_rejected = st.columns(3)
+    with col_pending:
+        st.metric("Pending", f"{counts['Pending']:,}")
+    with col_approved:
+        st.metric("Approved", f"{counts['Approved']:,}")
+    with col_rejected:
+        st.metric("Rejected", f"{counts['Rejected']:,}")
+    notice = st.session_state.pop("moderation_notice", None)
+    if notice:
+        st.success(notice)
+
+    col_kind, col_size, col_refresh = st.columns([2, 1, 1])
+    with col_kind:
+        kind = st.radio("Show", ["All", "Photos", "Comments"], horizontal=True, key="moderation_kind", on_change=reset_moderation_batch)
+    with col_size:
+        batch_size = st.selectbox("Batch size", MODERATION_BATCH_SIZES, key="moderation_batch_size", on_change=reset_moderation_batch)
+    with col_refresh:
+        st.button("🔄 Next batch", key="moderation_refresh", on_click=reset_moderation_batch, help="Show the current top of the queue")
+
+    # The batch stays fixed until a decision or a filter change, so posts arriving meanwhile
+    # don't shift rows under the moderator's checkboxes
+    batch = st.session_state.get("moderation_batch")
+    if batch is None:
+        kind_filter = {"All": None, "Photos": "photo", "Comments": "comment"}[kind]
+        batch = {
+            "items": queue.pending_items(kind_filter, limit=batch_size),
+            "token": st.session_state.get("moderation_batch_token", 0) + 1
+        }
+        st.session_state["moderation_batch"] = batch
+        st.session_state["moderation_batch_token"] = batch["token"]
+    if not batch["items"]:
+        st.info("Nothing is waiting for review.")
+        return
+
+    with get_metrics().timer("admin.moderation"):
+        items_df = queue.frame(batch["items"])
+    items_df.insert(0, "Select", False)
+    edited = st.data_editor(
+        items_df,
+        key=f"moderation_editor_{batch['token']}", # New batch, fresh selection
+        use_container_width=True,
+        hide_index=True,
+        disabled=[column for column in items_df.columns if column != "Select"],
+        column_config={
+            "Item": None,
+            "Spam Score (%)": st.column_config.ProgressColumn(min_value=0, max_value=100, format="%.0f%%"),
+            "Content": st.column_config.TextColumn(width="large")
+        }
+    )
+    pending = items_df["Status"] == "Pending"
+    selected = edited.loc[edited["Select"] & pending, "Item"].tolist()
+    likely_spam = items_df.loc[pending & (items_df["Spam Score (%)"] >= LIKELY_SPAM_SCORE), "Item"].tolist()
+    likely_ok = items_df.loc[pending & (items_df["Spam Score (%)"] < LIKELY_OK_SCORE), "Item"].tolist()
+
+    col_approve, col_reject, col_ok, col_spam = st.columns(4)
+    with col_approve:
+        st.button(f"✅ Approve selected ({len(selected)})", key="moderation_approve", disabled=not selected, on_click=moderate, args=(selected, True))
+    with col_reject:
+        st.button(f"🚫 Reject selected ({len(selected)})", key="moderation_reject", disabled=not selected, on_click=moderate, args=(selected, False))
+    with col_ok:
+        st.button(f"Approve all below {LIKELY_OK_SCORE}% ({len(likely_ok)})", key="moderation_approve_ok", disabled=not likely_ok, on_click=moderate, args=(likely_ok, True))
+    with col_spam:
+        st.button(f"Reject all from {LIKELY_SPAM_SCORE}% ({len(likely_spam)})", key="moderation_reject_spam", disabled=not likely_spam, on_click=moderate, args=(likely_spam, False))
+    st.caption("Posts are published immediately; rejected ones are hidden from the Community feeds. Every decision also trains the spam score.")
+
 def display_admin_panel():
     """Displays the administrative panel for managing the app."""
     st.markdown("<h1 class='sub-title'>🔧 Admin Panel</h1>", unsafe_allow_html=True)
@@ -794,88 +1478,81 @@ def display_admin_panel():
         # Removed disabled button as it serves no purpose
 
     with admin_tabs[1]:
-        st.markdown("### Content Moderation (Simulated)")
-
-        mod_tabs = st.tabs(["Pending Photos", "Reported Comments"])
-
-        with mod_tabs[0]:
-            st.markdown("#### Photos Pending Review")
-            # Mock pending photos - generate dynamically for demo effect
-            pending_photos = []
-            if random.random() > 0.5: # Simulate having pending photos sometimes
-                pending_photos = [
-                      {"id": f"photo_{random.randint(1000,9999)}", "user": "plantlover_demo", "caption": "My new garden setup (needs review)", "timestamp": datetime.now() - pd.Timedelta(hours=random.randint(1,5)), "image_bytes": None, "status": "pending"},
-                      {"id": f"photo_{random.randint(1000,9999)}", "user": "greenthumb_demo", "caption": "Urban farming progress (needs review)", "timestamp": datetime.now() - pd.Timedelta(hours=random.randint(1,5)), "image_bytes": None, "status": "pending"}
-                ]
-
-            if not pending_photos:
-                 st.info("No photos currently pending review.")
-            else:
-                 for i, photo in enumerate(pending_photos):
-                     # Using container for layout
-                     with st.container():
-                         st.markdown(f"**User:** {photo['user']} | **Posted:** {photo['timestamp'].strftime('%Y-%m-%d %H:%M')}")
-                         st.markdown(f"**Caption:** {photo['caption']}")
-                         st.markdown("*(Image preview N/A in Simulation)*")
-
-                         col1, col2 = st.columns(2)
-                         with col1:
-                             if st.button("Approve (Sim)", key=f"approve_photo_{photo['id']}"):
-                                 st.success(f"Photo {photo['id']} approved! (Simulation)")
-                                 # In real app, update status and potentially remove from this list
-                         with col2:
-                             if st.button("Reject (Sim)", key=f"reject_photo_{photo['id']}"):
-                                 st.error(f"Photo {photo['id']} rejected! (Simulation)")
-                                 # In real app, update status/delete
-                         st.markdown("---")
-
-        with mod_tabs[1]:
-            st.markdown("#### Reported Comments")
-            # Mock reported comments - generate dynamically
-            reported_comments = []
-            if random.random() > 0.3: # Simulate reported comments
-                 reported_comments = [
-                    {"id": f"comment_{random.randint(1000,9999)}", "user": "SpamBot_demo", "comment": "Buy cheap widgets now! www.spam.com (Reported)", "timestamp": datetime.now() - pd.Timedelta(days=random.randint(1,3)), "reported_by": "greenthumb_demo", "status": "reported"},
-                 ]
-            if random.random() > 0.6:
-                 reported_comments.append(
-                    {"id": f"comment_{random.randint(1000,9999)}", "user": "RudeUser_demo", "comment": "Your plants look terrible! (Reported)", "timestamp": datetime.now() - pd.Timedelta(hours=random.randint(2,10)), "reported_by": "plantlover_demo", "status": "reported"}
-                 )
-
-            if not reported_comments:
-                 st.info("No comments currently reported.")
-            else:
-                 for i, comment in enumerate(reported_comments):
-                     # Using container for layout
-                     with st.container():
-                         st.markdown(f"**User:** {comment['user']} | **Reported by:** {comment.get('reported_by', 'Unknown')}")
-                         st.markdown(f"**Comment:**")
-                         st.markdown(f"> {comment['comment']}")
-                         st.caption(f"Posted: {comment['timestamp'].strftime('%Y-%m-%d %H:%M')}")
-
-                         col1, col2 = st.columns(2)
-                         with col1:
-                             if st.button("Dismiss Report (Sim)", key=f"keep_comment_{comment['id']}"):
-                                 st.success(f"Report for comment {comment['id']} dismissed. (Simulation)")
-                                 # In real app, change status
-                         with col2:
-                             if st.button("Delete Comment (Sim)", key=f"delete_comment_{comment['id']}"):
-                                 st.warning(f"Comment {comment['id']} deleted! (Simulation)")
-                                 # In real app, delete comment
-                         st.markdown("---")
+        display_moderation_queue()
 
     with admin_tabs[2]:
-        st.markdown("### System Statistics (Simulated)")
+        st.markdown("### System Statistics")
 
-        col1, col2, col3 = st.columns(3)
+        stats = sample_system_stats()
+        col1, col2, col3, col4 = st.columns(4)
         with col1:
-            st.metric("Active Users (Sample)", f"{random.randint(200, 300)}", f"{random.randint(-5, 15)} today")
+            st.metric("Live Sessions", f"{stats['sessions']}")
+        timings = get_metrics().summary()
+        page_timings = [t for t in timings if t["name"].startswith("page.")]
         with col2:
-            st.metric("Server Load (Simulated)", f"{random.randint(15, 45)}%", f"{random.randint(-5, 5)}%")
+            # Slowest page by p95, from the render timing histograms below
+            slowest = max(page_timings, key=lambda t: t["p95_ms"], default=None)
+            st.metric("Slowest Page (p95)", f"{slowest['p95_ms']:,.0f} ms" if slowest else "n/a", slowest["name"][len("page."):] if slowest else None, delta_color="off")
         with col3:
-            num_uploads = len(st.session_state.get('uploads', []))
-            storage_gb = round(num_uploads * 0.002, 2) # Rough estimate (2MB per photo)
-            st.metric("Estimated Media Storage", f"{storage_gb} GB", f"+{round(random.random()*0.05, 2)} GB")
+            rss = stats["rss_bytes"]
+            st.metric("Process Memory (RSS)", f"{rss / 1e6:,.0f} MB" if rss is not None else "n/a")
+        with col4:
+            st.metric("Media Storage", f"{stats['media_bytes'] / 1e9:,.2f} GB")
+
+        st.markdown("#### Session State Footprint (MB)")
+        footprint = stats["footprint"]
+        st.dataframe(
+            footprint.head(20), # Heaviest sessions first
+            use_container_width=True,
+            hide_index=True,
+            column_config={
+                column: st.column_config.NumberColumn(format="%.2f")
+                for column in footprint.columns if column != "Session"
+            }
+        )
+        st.caption(f"{footprint['Total (MB)'].sum():,.2f} MB across {stats['sessions']} session(s), sampled {stats['sampled_at'].strftime('%H:%M:%S')} (refreshed at most every 10 seconds). Session data sizes are tracked by the memory budget (spilled data counts as 0); other keys are sampled estimates.")
+        spill = stats["spill"]
+        st.caption(
+            f"Memory budget: {SESSION_MEMORY_BUDGET_MB} MB per session, {GLOBAL_MEMORY_BUDGET_MB} MB in total. "
+            f"Resident: {spill['resident_bytes'] / 1e6:,.1f} MB in {spill['resident_objects']} object(s); "
+            f"spilled to disk: {spill['spilled_bytes'] / 1e6:,.1f} MB in {spill['spilled_objects']} object(s)."
+        )
+
+        st.markdown("#### Render Timing (since server start)")
+        if not timings:
+            st.info("No renders timed yet.")
+        else:
+            # page.* covers a whole page; other rows are sections inside a page (or report downloads)
+            timing_df = pd.DataFrame(timings).rename(columns={
+                "name": "Section", "count": "Renders", "total_s": "Total (s)", "mean_ms": "Mean (ms)",
+                "p50_ms": "p50 (ms)", "p95_ms": "p95 (ms)", "max_ms": "Max (ms)"
+            }).sort_values("Total (s)", ascending=False)
+            st.dataframe(
+                timing_df,
+                use_container_width=True,
+                hide_index=True,
+                column_config={
+                    column: st.column_config.NumberColumn(format="%.1f")
+                    for column in ["Total (s)", "Mean (ms)", "p50 (ms)", "p95 (ms)", "Max (ms)"]
+                }
+            )
+            st.caption("Percentiles are estimated from fixed histogram buckets.")
+
+            col_file, col_download = st.columns(2)
+            with col_file:
+                if st.button("Export to metrics file", key="export_metrics_file"):
+                    path = get_metrics().write_textfile(os.path.join(DATA_DIR, "metrics", "grow.prom"))
+                    st.success(f"Wrote {path}")
+            with col_download:
+                st.download_button(
+                    "Download Prometheus text",
+                    data=get_metrics().render_prometheus,
+                    file_name="grow_metrics.prom",
+                    mime="text/plain",
+                    key="download_metrics"
+                )
+            if METRICS_PORT:
+                st.caption(f"Also served at http://127.0.0.1:{METRICS_PORT}/metrics")
 
         st.markdown("#### Activity Overview (Last 7 Days - Sample Data)")
         activity_dates = pd.date_range(end=datetime.now(), periods=7, freq='D')
@@ -892,7 +1569,16 @@ def display_admin_panel():
         st.markdown("#### System Settings (Example)")
         # Use actual toggles/inputs but keep them disabled for the demo look
         st.toggle("Enable New User Registration", value=True, key="setting_reg_disabled", disabled=True)
-        st.number_input("Max Upload Size (MB)", min_value=1, max_value=20, value=5, key="setting_upload_disabled", disabled=True)
+        st.number_input(
+            "Max Upload Size (MB)",
+            min_value=SETTING_LIMITS["max_upload_mb"][0],
+            max_value=SETTING_LIMITS["max_upload_mb"][1],
+            value=get_settings().get("max_upload_mb"),
+            key="setting_max_upload_mb",
+            on_change=lambda: get_settings().set("max_upload_mb", st.session_state["setting_max_upload_mb"]),
+            help="Photo Wall uploads above this size are refused before they are sent."
+        )
+        st.caption(f"Accepted photos are stored without EXIF metadata, as JPEG (quality {INGEST_QUALITY}, at most {INGEST_MAX_SIDE} px on the long side).")
         st.selectbox("Default User Role on Signup", ["user", "pending_approval"], key="setting_role_disabled", disabled=True)
 
         # Removed disabled save button
@@ -901,9 +1587,9 @@ def display_admin_panel():
         st.markdown("#### Maintenance Tasks")
 
         task_options = {
-            "Clear Application Cache": "Clears Streamlit's internal caches.",
-            "Backup Database": "Triggers a backup of the application database (simulation).",
-            "Recalculate User Statistics": "Updates derived stats like badges or activity scores.",
+            "Clear Application Cache": "Clears Streamlit's data caches and the report cache.",
+            "Backup Database": "Copies the counters database and event log to data/backups.",
+            "Recalculate User Statistics": "Recomputes event totals and ROI aggregates from the event log.",
         }
 
         selected_tasks = st.multiselect(
@@ -916,21 +1602,24 @@ def display_admin_panel():
         # Use unique key for the run button to avoid state issues on rerun
         run_maint_key = f"run_maint_{'_'.join(sorted(selected_tasks))}" if selected_tasks else "run_maint_no_select"
 
-        if st.button("Run Selected Maintenance Tasks (Sim)", key=run_maint_key):
+        if st.button("Run Selected Maintenance Tasks", key=run_maint_key):
             if selected_tasks:
-                progress_bar = st.progress(0, text="Starting maintenance...")
-                status_text = st.empty()
-                total_tasks = len(selected_tasks)
-                for i, task in enumerate(selected_tasks):
-                     status_text.info(f"Simulating: {task} ({task_options[task]})")
-                     time.sleep(random.uniform(0.5, 1.0)) # Simulate work
-                     progress_bar.progress((i + 1) / total_tasks, text=f"Running task {i+1}/{total_tasks}...")
-                status_text.success(f"Completed {total_tasks} maintenance tasks! (Simulation)")
-                progress_bar.empty() # Remove progress bar on completion
-                st.balloons()
+                # Jobs run on the scheduler's worker threads; this returns immediately
+                scheduler = get_job_scheduler()
+                for task in selected_tasks:
+                    if task == "Clear Application Cache":
+                        scheduler.submit(task, clear_caches, st.cache_data, get_report_cache())
+                    elif task == "Backup Database":
+                        scheduler.submit(task, backup_data, get_impact_counters(), get_event_log(), os.path.join(DATA_DIR, "backups"))
+                    elif task == "Recalculate User Statistics":
+                        scheduler.submit(task, recalculate_statistics, get_event_log(), get_roi_engine())
+                st.success(f"Queued {len(selected_tasks)} maintenance task(s).")
             else:
                  st.warning("Please select at least one maintenance task to run.")
 
+        # Poll job status every second while anything is queued or running
+        st.fragment(display_maintenance_jobs, run_every=1 if get_job_scheduler().has_active_jobs() else None)()
+
 
 # ------ MAIN APP LOGIC ------
 def main():
@@ -948,19 +1637,24 @@ def main():
     current_user_name = "Community User" # Can be changed if desired
 
     # --- Page Content Rendering ---
-    # Display content based on selected page and simulated role
-    if page == "Home":
-        display_home(billboards)
-    elif page == "My Plants":
-        display_my_plants()
-    elif page == "Community":
-        display_community(current_user_name) # Pass the generic name
-    elif page == "Sponsor Dashboard":
-        # Access controlled by sidebar logic based on simulated_role
-        display_sponsor_dashboard()
-    elif page == "Admin Panel":
-        # Access controlled by sidebar logic based on simulated_role
-        display_admin_panel()
+    # Display content based on selected page and simulated role (timed per page, see Admin > System Statistics)
+    try:
+        with get_metrics().timer(f"page.{page}"):
+            if page == "Home":
+                display_home(billboards)
+            elif page == "My Plants":
+                display_my_plants()
+            elif page == "Community":
+                display_community(current_user_name) # Pass the generic name
+            elif page == "Sponsor Dashboard":
+                # Access controlled by sidebar logic based on simulated_role
+                display_sponsor_dashboard(billboards)
+            elif page == "Admin Panel":
+                # Access controlled by sidebar logic based on simulated_role
+                display_admin_panel()
+    finally:
+        # Also runs on st.rerun(): this session's data becomes spillable again
+        get_spill_manager().release(session_owner())
 
     # --- Footer --- (Optional)
     st.markdown("---")
@@ -0,0 +1,91 @@
+import pytest
+
+from farmboard.search import SearchIndex, stem, tokenize
+
+
+@pytest.mark.parametrize("words", [
+    ("yellowing", "yellowed", "yellow"),
+    ("planning", "planned", "plan"),
+    ("tomatoes", "tomato"),
+    ("leaves", "leaf"),
+    ("halves", "half"),
+    ("loaves", "loaf"),
+    ("knives", "knife"),
+    ("chives", "chive"),
+    ("olives", "olive"),
+    ("gloves", "glove"),
+    ("berries", "berry"),
+    ("moving", "move"),
+])
+def test_stem_conflates_related_forms(words):
+    assert len({stem(word) for word in words}) == 1
+
+
+@pytest.mark.parametrize("word", ["grass", "cactus", "basis", "seed", "bring", "red", "falling", "2024"])
+def test_stem_keeps_words_that_only_look_inflected(word):
+    assert stem(word) == {"falling": "fall"}.get(word, word)
+
+
+def test_stem_does_not_merge_unrelated_words():
+    assert stem("leaves") != stem("leave")
+    assert stem("plan") != stem("plant")
+
+
+def test_tokenize_lowercases_and_drops_stopwords_and_single_characters():
+    assert tokenize("The Tomatoes are YELLOWING, a bit!") == [stem("tomatoes"), stem("yellowing"), "bit"]
+
+
+def test_tokenize_splits_on_punctuation_and_keeps_numbers():
+    assert tokenize("ph-6.5 soil") == ["ph", "soil"]
+    assert tokenize("watered 3x in 2024") == [stem("watered"), "3x", "2024"]
+
+
+def test_tokenize_empty_and_stopword_only_text():
+    assert tokenize("") == []
+    assert tokenize("it is what it is") == []
+
+
+def make_index(documents):
+    index = SearchIndex()
+    for key, text in documents:
+        index.add(key, text)
+    return index
+
+
+def test_search_matches_across_word_forms():
+    index = make_index([("a", "My basil leaves are yellowing"), ("b", "Harvested carrots today")])
+    assert index.search("yellow leaf") == (["a"], 1)
+
+
+def test_search_ranks_documents_with_more_query_terms_first():
+    index = make_index([
+        ("one", "aphids on the tomato plants"),
+        ("both", "aphids on the tomato plants, spraying neem oil"),
+        ("none", "compost is ready"),
+    ])
+    keys, total = index.search("neem aphids")
+    assert keys == ["both", "one"]
+    assert total == 2
+
+
+def test_search_prefers_rare_terms():
+    index = make_index([("common", "water")] + [(f"w{i}", "water daily") for i in range(5)] + [("rare", "mulch")])
+    keys, _ = index.search("water mulch")
+    assert keys[0] == "rare"
+
+
+def test_search_prefers_shorter_documents_for_equal_term_counts():
+    index = make_index([("long", "mulch keeps the soil moist through long dry summer weeks"), ("short", "mulch works")])
+    assert index.search("mulch")[0] == ["short", "long"]
+
+
+def test_search_breaks_ties_by_newer_document_and_applies_limit():
+    index = make_index([(i, "fresh basil") for i in range(5)])
+    assert index.search("basil", limit=3) == ([4, 3, 2], 5)
+
+
+def test_search_without_matches_or_terms():
+    index = make_index([("a", "fresh basil")])
+    assert index.search("cucumber") == ([], 0)
+    assert index.search("the and") == ([], 0)
+    assert SearchIndex().search("basil") == ([], 0)